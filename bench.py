@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""Offline export benchmarks for dc.py
+
+Starts a local stand-in for the Discord REST API with generated guilds,
+channels, members and messages, points dc.API_ENDPOINT at it and measures
+run_export and a few utility functions: wall time, requests per second, peak
+RSS and retries. Every scenario runs in a fresh process so its peak RSS is its
+own. The codec scenarios decode and re-encode the generated member and message
+pages without the API, with the installed JSON backend and with the json module.
+
+    python bench.py --guilds 200 --members 5000 --latency 40 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+from colorama import Fore, Style
+
+import dc
+
+BOT_ID = "900000000000000001"
+GUILD_ID_BASE = 100000000000000000
+MESSAGE_ID_BASE = 1100000000000000000
+SCENARIOS = ("export", "selective", "messages", "utility", "codec", "codec-stdlib")
+
+DEFAULT_CONFIG = {
+    "guilds": 50,
+    "channels": 5,  # text channels per guild
+    "members": 2000,  # members per guild
+    "messages": 300,  # messages per channel
+    "latency": 30.0,  # milliseconds per response
+    "jitter": 10.0,  # milliseconds added at random
+    "bucket_limit": 5,  # requests per route bucket and window
+    "bucket_reset": 1.0,  # seconds per bucket window
+    "global_limit": 50,  # requests per second per bot, 0 to disable
+    "rate_limit_rate": 0.0,  # share of requests answered with an injected 429
+    "error_rate": 0.0,  # share of requests answered with an injected 5xx
+}
+
+
+class FakeDiscordAPI:
+    """aiohttp application answering the routes DiscordExporter uses with generated data
+
+    Route buckets and the global limit are enforced like Discord does, with
+    rate limit headers on every response, and 429s and 5xx responses can be
+    injected at random.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.stats = {"requests": 0, "rate_limited": 0, "injected_rate_limits": 0, "injected_errors": 0}
+        # (route, major parameter) -> [window start, requests in window]
+        self.buckets: Dict[tuple, List[float]] = {}
+        self.global_window = [0.0, 0]
+        self.app = web.Application(client_max_size=16 * 1024 * 1024)
+        self.app.router.add_get("/_stats", self.handle_stats)
+        self.app.router.add_route("*", "/api/v10/{path:.*}", self.handle)
+
+    async def handle_stats(self, request):
+        return web.json_response(self.stats)
+
+    async def handle(self, request):
+        self.stats["requests"] += 1
+        config = self.config
+        if config["latency"] or config["jitter"]:
+            await asyncio.sleep((config["latency"] + random.uniform(0, config["jitter"])) / 1000)
+
+        endpoint = "/" + request.match_info["path"]
+        route, major = dc.get_route_key(request.method, endpoint)
+        now = time.monotonic()
+
+        if random.random() < config["error_rate"]:
+            self.stats["injected_errors"] += 1
+            return web.json_response({"message": "Server error", "code": 0}, status=random.choice((500, 502, 503)))
+        if random.random() < config["rate_limit_rate"]:
+            self.stats["injected_rate_limits"] += 1
+            return self.rate_limited(random.uniform(0.05, 0.5), "user")
+
+        if config["global_limit"]:
+            if now - self.global_window[0] >= 1:
+                self.global_window = [now, 0]
+            if self.global_window[1] >= config["global_limit"]:
+                self.stats["rate_limited"] += 1
+                return self.rate_limited(self.global_window[0] + 1 - now, "global")
+            self.global_window[1] += 1
+
+        window = self.buckets.get((route, major))
+        if window is None or now - window[0] >= config["bucket_reset"]:
+            window = self.buckets[(route, major)] = [now, 0]
+        reset_after = window[0] + config["bucket_reset"] - now
+        if window[1] >= config["bucket_limit"]:
+            self.stats["rate_limited"] += 1
+            return self.rate_limited(reset_after, "user")
+        window[1] += 1
+
+        headers = {
+            "X-RateLimit-Limit": str(config["bucket_limit"]),
+            "X-RateLimit-Remaining": str(config["bucket_limit"] - window[1]),
+            "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+            "X-RateLimit-Bucket": hashlib.md5(route.encode('utf-8')).hexdigest()[:12]
+        }
+
+        if request.method in ("PUT", "DELETE"):
+            return web.Response(status=204, headers=headers)
+        if request.method == "POST":
+            body = await request.json() if request.can_read_body else {}
+            return web.json_response(dict(body or {}, id=str(random.randrange(10 ** 17, 10 ** 18))), headers=headers)
+        return web.json_response(self.respond(endpoint, request.query), headers=headers)
+
+    def rate_limited(self, retry_after: float, scope: str):
+        retry_after = max(0.001, retry_after)
+        headers = {"Retry-After": f"{retry_after:.3f}", "X-RateLimit-Scope": scope}
+        if scope == "global":
+            headers["X-RateLimit-Global"] = "true"
+        body = {"message": "You are being rate limited.", "retry_after": retry_after, "global": scope == "global"}
+        return web.json_response(body, status=429, headers=headers)
+
+    def respond(self, endpoint: str, query) -> Any:
+        """Generated payload of a GET request"""
+        config = self.config
+        parts = endpoint.strip("/").split("/")
+
+        if endpoint == "/users/@me":
+            return {"id": BOT_ID, "username": "bench", "discriminator": "0", "bot": True}
+        if endpoint == "/oauth2/applications/@me":
+            return {"id": BOT_ID, "name": "bench", "bot_public": True, "flags": 0, "owner": {"id": "1"}}
+        if endpoint == "/users/@me/guilds":
+            after = int(query.get("after", 0))
+            limit = int(query.get("limit", 200))
+            first = max(0, after - GUILD_ID_BASE + 1) if after else 0
+            return [
+                {"id": str(GUILD_ID_BASE + index), "name": f"Guild {index}", "owner": False, "permissions": "8", "features": []}
+                for index in range(first, min(config["guilds"], first + limit))
+            ]
+        if endpoint == "/gateway/bot":
+            return {"url": "wss://gateway.discord.gg", "shards": 1,
+                    "session_start_limit": {"total": 1000, "remaining": 999, "reset_after": 0, "max_concurrency": 1}}
+        if endpoint == "/voice/regions":
+            return [{"id": "rotterdam", "name": "Rotterdam", "optimal": True}]
+
+        if parts[0] == "guilds" and len(parts) >= 2 and parts[1].isdigit():
+            guild_id = int(parts[1])
+            resource_name = "/".join(parts[2:])
+            if not resource_name:
+                return {
+                    "id": str(guild_id), "name": f"Guild {guild_id - GUILD_ID_BASE}", "owner_id": "1",
+                    "roles": [{"id": str(guild_id + 1 + index), "name": f"role {index}", "permissions": "0"} for index in range(5)],
+                    "emojis": [{"id": str(guild_id + 10 + index), "name": f"emoji{index}"} for index in range(3)],
+                    "stickers": [{"id": str(guild_id + 20), "name": "sticker"}],
+                    "approximate_member_count": config["members"], "approximate_presence_count": config["members"] // 4
+                }
+            if resource_name == "channels":
+                return [
+                    {"id": str(guild_id * 10 + index), "type": 0, "name": f"channel-{index}", "guild_id": str(guild_id),
+                     "last_message_id": str(MESSAGE_ID_BASE + config["messages"] - 1)}
+                    for index in range(config["channels"])
+                ]
+            if resource_name == "members":
+                after = int(query.get("after", 0))
+                limit = int(query.get("limit", 1))
+                return [
+                    {"user": {"id": str(user_id), "username": f"user{user_id}"}, "roles": [], "joined_at": "2020-01-01T00:00:00+00:00"}
+                    for user_id in range(after + 1, min(config["members"], after + limit) + 1)
+                ]
+            if resource_name == "audit-logs":
+                limit = int(query.get("limit", 50))
+                return {"audit_log_entries": [{"id": str(guild_id + index), "action_type": 1} for index in range(limit)],
+                        "users": [], "webhooks": []}
+            if resource_name == "threads/active":
+                return {"threads": [], "members": []}
+            if resource_name == "widget":
+                return {"enabled": False, "channel_id": None}
+            if resource_name == "welcome-screen":
+                return {"description": None, "welcome_channels": []}
+            return []
+
+        if parts[0] == "channels" and len(parts) >= 3:
+            if parts[2] == "messages":
+                limit = int(query.get("limit", 50))
+                newest = MESSAGE_ID_BASE + config["messages"] - 1
+                if "after" in query:
+                    # The page right after the cursor, still newest first
+                    first = max(int(query["after"]) + 1, MESSAGE_ID_BASE)
+                    last = min(first + limit - 1, newest)
+                else:
+                    before = int(query["before"]) - 1 if "before" in query else newest
+                    last = min(before, newest)
+                    first = max(MESSAGE_ID_BASE, last - limit + 1)
+                return [
+                    {"id": str(message_id), "channel_id": parts[1], "content": f"message {message_id}",
+                     "author": {"id": "1"}, "type": 0}
+                    for message_id in range(last, first - 1, -1)
+                ]
+            if parts[2] == "threads":
+                return {"threads": [], "has_more": False}
+        return []
+
+
+def serve(config: Dict[str, Any], ports):
+    """Run the fake API in this process and report its port"""
+    async def run():
+        runner = web.AppRunner(FakeDiscordAPI(config).app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        ports.put(runner.addresses[0][1])
+        await asyncio.Event().wait()
+    asyncio.run(run())
+
+
+def run_codec(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode the generated member and message pages and encode them as the exporter does"""
+    api = FakeDiscordAPI(config)
+    pages = []
+    for guild_index in range(config["guilds"]):
+        guild_id = GUILD_ID_BASE + guild_index
+        for after in range(0, config["members"], dc.MEMBERS_PAGE_SIZE):
+            query = {"after": str(after), "limit": str(dc.MEMBERS_PAGE_SIZE)}
+            pages.append(json.dumps(api.respond(f"/guilds/{guild_id}/members", query)).encode('utf-8'))
+        for channel_index in range(config["channels"]):
+            before = MESSAGE_ID_BASE + config["messages"]
+            while before > MESSAGE_ID_BASE:
+                query = {"before": str(before), "limit": str(dc.MESSAGES_PAGE_SIZE)}
+                page = api.respond(f"/channels/{guild_id * 10 + channel_index}/messages", query)
+                pages.append(json.dumps(page).encode('utf-8'))
+                before = int(page[-1]["id"])
+
+    started = time.perf_counter()
+    decoded = [dc.load_json(page) for page in pages]
+    lines = b"".join(dc.dump_json(record) + b"\n" for page in decoded for record in page)
+    document = dc.dump_json(decoded, indent=2)
+    return {
+        "wall_time": time.perf_counter() - started,
+        "client_requests": 0,
+        "bytes": sum(len(page) for page in pages) + len(lines) + len(document),
+        "retries": 0,
+        "peak_concurrency": 0
+    }
+
+
+def run_scenario(scenario: str, api_endpoint: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one benchmark scenario in this process and return its measurements"""
+    dc.API_ENDPOINT = api_endpoint
+    directory = tempfile.mkdtemp(prefix=f"dc-bench-{scenario}-")
+    output = sys.stdout if options["verbose"] else open(os.devnull, 'w')
+
+    async def run():
+        exporter = dc.DiscordExporter(
+            concurrency=options["concurrency"],
+            max_concurrency=options["max_concurrency"],
+            stream_dir=os.path.join(directory, "export")
+        )
+        exporter.set_token(f"{BOT_ID}.bench")
+
+        started = time.perf_counter()
+        if scenario == "export":
+            await exporter.run_export()
+        elif scenario == "selective":
+            await exporter.run_export(dc.resolve_exporters(["export_bans", "export_audit_logs", "export_roles"]))
+        elif scenario == "messages":
+            await exporter.run_export(dc.resolve_exporters(["export_message_history"]))
+        elif scenario == "utility":
+            channel_id = str(GUILD_ID_BASE * 10)
+            calls = options["utility_calls"]
+            await asyncio.gather(*(dc.send_message(exporter, channel_id, f"bench {index}") for index in range(calls)))
+            await asyncio.gather(*(dc.get_messages(exporter, channel_id) for _ in range(calls)))
+            await asyncio.gather(*(dc.create_role(exporter, str(GUILD_ID_BASE), f"role {index}") for index in range(calls)))
+            await exporter.close_session()
+        wall_time = time.perf_counter() - started
+
+        stats = exporter.request_stats.summary()
+        return {
+            "wall_time": wall_time,
+            "client_requests": stats["total_requests"],
+            "bytes": stats["total_bytes"],
+            "retries": exporter.retry_policy.metrics["retries"],
+            "peak_concurrency": exporter.concurrency_controller.metrics()["peak_limit"]
+        }
+
+    try:
+        with contextlib.redirect_stdout(output):
+            if scenario.startswith("codec"):
+                if scenario == "codec-stdlib":
+                    dc.orjson = None
+                result = run_codec(options["config"])
+            else:
+                result = asyncio.run(run())
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        shutil.rmtree(directory, ignore_errors=True)
+    # ru_maxrss is in kilobytes on Linux
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return result
+
+
+async def fetch_server_stats(base_url: str) -> Dict[str, int]:
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{base_url}/_stats") as response:
+            return await response.json()
+
+
+def run_benchmarks(config: Dict[str, Any], scenarios: List[str], options: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Start the fake API and run every scenario against it in its own process"""
+    context = multiprocessing.get_context("spawn")
+    ports = context.Queue()
+    server = context.Process(target=serve, args=(config, ports), daemon=True)
+    server.start()
+    base_url = f"http://127.0.0.1:{ports.get(timeout=30)}"
+
+    results = {}
+    try:
+        for scenario in scenarios:
+            before = asyncio.run(fetch_server_stats(base_url))
+            with context.Pool(1) as pool:
+                result = pool.apply(run_scenario, (scenario, f"{base_url}/api/v10", options))
+            after = asyncio.run(fetch_server_stats(base_url))
+
+            result["server_requests"] = after["requests"] - before["requests"]
+            result["rate_limited"] = (after["rate_limited"] + after["injected_rate_limits"]
+                                      - before["rate_limited"] - before["injected_rate_limits"])
+            result["requests_per_second"] = result["server_requests"] / result["wall_time"] if result["wall_time"] else 0.0
+            results[scenario] = result
+            print_result(scenario, result)
+    finally:
+        server.terminate()
+        server.join()
+    return results
+
+
+def print_result(scenario: str, result: Dict[str, Any]):
+    print(f"{Fore.GREEN}{scenario:<14}{Style.RESET_ALL}"
+          f"{result['wall_time']:>9.2f}s"
+          f"{result['server_requests']:>9}"
+          f"{result['requests_per_second']:>9.1f}"
+          f"{result['peak_rss_mb']:>10.1f}"
+          f"{result['retries']:>8}"
+          f"{result['rate_limited']:>6}"
+          f"{result['peak_concurrency']:>6}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark dc.py against a local stand-in for the Discord API")
+    for key, default in DEFAULT_CONFIG.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(default), default=default)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Comma-separated scenarios to run (default: {','.join(SCENARIOS)})")
+    parser.add_argument("--concurrency", type=int, default=dc.DEFAULT_CONCURRENCY,
+                        help="Requests in flight the exporter's adaptive limit starts at")
+    parser.add_argument("--max-concurrency", type=int, default=dc.DEFAULT_MAX_CONCURRENCY,
+                        help="Ceiling of the adaptive limit, equal to --concurrency for a fixed limit")
+    parser.add_argument("--utility-calls", type=int, default=100, help="Calls per utility function")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="Show the exporter's own output")
+    args = parser.parse_args(argv)
+
+    scenarios = [scenario.strip() for scenario in args.scenarios.split(",") if scenario.strip()]
+    unknown = [scenario for scenario in scenarios if scenario not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    config = {key: getattr(args, key) for key in DEFAULT_CONFIG}
+    options = {
+        "concurrency": args.concurrency,
+        "max_concurrency": args.max_concurrency,
+        "utility_calls": args.utility_calls,
+        "verbose": args.verbose,
+        "config": config
+    }
+
+    print(f"{Fore.CYAN}Fake API: {json.dumps(config)}{Style.RESET_ALL}")
+    print(f"{'Scenario':<14}{'Wall':>10}{'Reqs':>9}{'Req/s':>9}{'RSS MB':>10}{'Retry':>8}{'429':>6}{'Conc':>6}")
+    results = run_benchmarks(config, scenarios, options)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"options": options, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,21 +3,46 @@
 import argparse
 import asyncio
 import datetime
+import gzip
 import json
 import os
 import sys
 import time
 import random
 import string
+import tempfile
+import threading
 import uuid
 import re
+import ssl
+import concurrent.futures
+import contextlib
+import copy
 import hashlib
+import multiprocessing
+import shutil
+import sqlite3
 import base64
+import collections
+import contextvars
 import urllib.parse
 from typing import Any, Dict, List, Optional, Tuple, Union, Set
 
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, the shared rate limit store needs it
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:
+    # Optional, decodes API responses and encodes the export several times faster
+    orjson = None
+
 import aiohttp
 import colorama
+from multidict import CIMultiDict
 from colorama import Fore, Style, Back
 
 # Initialize colorama
@@ -54,7 +79,47 @@ colorama.init(autoreset=True)
 # Constants
 API_ENDPOINT = "https://discord.com/api/v10"
 USER_AGENT = "DiscordBotExporter/1.0"
-RATE_LIMIT_RETRY_DELAY = 5  # seconds
+RATE_LIMIT_RETRY_DELAY = 5  # seconds, when a 429 response doesn't say how long to wait
+RATE_LIMIT_MAX_RETRIES = 10  # 429 retries per request before giving up
+RETRY_ATTEMPTS = 5  # attempts per request on server and network errors
+RETRY_BASE_DELAY = 0.5  # seconds, first backoff step
+RETRY_MAX_DELAY = 30  # seconds, backoff cap
+RETRY_BUDGET = 500  # server and network error retries per run
+GLOBAL_RATE_LIMIT = 50  # requests per second per bot
+DEFAULT_CONCURRENCY = 16  # requests in flight at once, the starting point of the adaptive limit
+DEFAULT_MAX_CONCURRENCY = 64  # ceiling of the adaptive limit
+CONCURRENCY_DECREASE_FACTOR = 0.5  # multiplicative decrease on 429s, errors and latency spikes
+LATENCY_TOLERANCE = 2.0  # smoothed latency above this multiple of the best latency counts as degraded
+LATENCY_SLACK = 0.05  # seconds added to the tolerance so jitter on fast links isn't taken for congestion
+CONCURRENCY_HISTORY_SIZE = 500  # limit changes kept for the metadata
+LATENCY_SAMPLE_SIZE = 1000  # latencies sampled per route for the percentiles
+GUILDS_PAGE_SIZE = 200  # maximum page size of /users/@me/guilds
+MEMBERS_PAGE_SIZE = 1000  # maximum page size of /guilds/{id}/members
+MESSAGES_PAGE_SIZE = 100  # maximum page size of /channels/{id}/messages
+DISCORD_EPOCH = 1420070400000  # milliseconds, first second of 2015
+# Channel types whose messages are exported: text, announcement and the three thread types
+MESSAGE_CHANNEL_TYPES = (0, 5, 10, 11, 12)
+# Channel types that can have archived public threads: text, announcement, forum and media
+THREAD_PARENT_CHANNEL_TYPES = (0, 5, 15, 16)
+DEFAULT_POOL_SIZE = 100  # total pooled connections
+DEFAULT_POOL_SIZE_PER_HOST = 64  # pooled connections to discord.com
+DNS_CACHE_TTL = 300  # seconds
+KEEPALIVE_TIMEOUT = 60  # seconds an idle connection is kept open
+CONNECT_TIMEOUT = 10  # seconds
+REQUEST_TIMEOUT = 60  # seconds
+OFFLOAD_QUEUE_SIZE = 8  # compression and file writing jobs queued or running at once
+CASSETTE_BUFFER_SIZE = 100  # responses recorded before they are handed to the cassette's writer thread
+MAJOR_PARAMETERS = ("channels", "guilds", "webhooks")
+DEFAULT_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "discord-bot-exporter", "responses.sqlite3")
+# Seconds a response of a slow-changing route is served from the response cache
+CACHE_TTLS = {
+    "GET /voice/regions": 86400,
+    "GET /gateway/bot": 300,
+    "GET /oauth2/applications/@me": 3600,
+    "GET /applications/{id}/commands": 3600,
+    "GET /applications/{id}/skus": 3600,
+    "GET /applications/{id}/role-connections/metadata": 3600,
+}
 DEFAULT_PREFIX = "!"
 MESSAGE_TYPES = {
     0: "DEFAULT",
@@ -91,25 +156,1548 @@ MESSAGE_TYPES = {
     32: "GUILD_APPLICATION_PREMIUM_SUBSCRIPTION"
 }
 
-class DiscordExporter:
+# Export dependency graph: exporter -> (export_data keys it reads, export_data keys it writes)
+# The order of this table is also the order of the components in the saved export.
+EXPORT_GRAPH = {
+    "export_basic_info": ((), ("application_info", "user_info")),
+    "export_guilds": ((), ("guilds", "detailed_guilds")),
+    "export_commands": (("application_info", "guilds"), ("global_commands", "guild_commands")),
+    "export_permissions": (("application_info", "guilds"), ("guild_permissions",)),
+    "export_channels": (("guilds",), ("guild_channels",)),
+    "export_webhooks": (("application_info", "guilds"), ("webhooks", "guild_webhooks")),
+    "export_interactions": ((), ("interactions",)),
+    "export_presence": (("user_info",), ("presence",)),
+    "export_voice_settings": (("detailed_guilds",), ("voice_regions", "guild_voice_states")),
+    "export_emoji": (("guilds", "detailed_guilds"), ("guild_emojis",)),
+    "export_stickers": (("guilds", "detailed_guilds"), ("guild_stickers",)),
+    "export_scheduled_events": (("guilds",), ("guild_events",)),
+    "export_roles": (("detailed_guilds",), ("guild_roles",)),
+    "export_invites": (("guilds",), ("guild_invites",)),
+    "export_bans": (("guilds",), ("guild_bans",)),
+    "export_audit_logs": (("guilds",), ("guild_audit_logs",)),
+    "export_widget_settings": (("guilds",), ("guild_widgets",)),
+    "export_integrations": (("guilds",), ("guild_integrations",)),
+    "export_templates": (("guilds",), ("guild_templates",)),
+    "export_welcome_screens": (("guilds",), ("guild_welcome_screens",)),
+    "export_auto_moderation": (("guilds",), ("guild_auto_mod_rules",)),
+    "export_stage_instances": ((), ("stage_instances",)),
+    "export_application_role_connections": (("application_info",), ("role_connections_metadata",)),
+    "export_entitlements": (("application_info",), ("entitlements",)),
+    "export_application_skus": (("application_info",), ("skus",)),
+    "export_auth_url": (("application_info",), ("auth_url",)),
+    "export_member_counts": (("detailed_guilds",), ("member_counts",)),
+    "export_message_stats": (("guild_channels",), ("message_stats",)),
+    "export_gateway_info": ((), ("gateway_info",)),
+    "export_application_assets": (("application_info",), ("application_assets",)),
+    "export_bot_usage_stats": (
+        ("guilds", "global_commands", "guild_commands", "member_counts", "guild_channels", "guild_webhooks",
+         "guild_emojis", "guild_stickers", "guild_events", "guild_roles", "guild_integrations"),
+        ("usage_stats_summary",)
+    ),
+    "export_public_bot_info": ((), ("public_info",)),
+    "export_oauth2_info": (("application_info",), ("oauth2_info",)),
+    "export_connection_info": (("gateway_info",), ("connection_info",)),
+    "export_intents_info": (("detailed_guilds", "message_stats"), ("intents_analysis",)),
+    "export_rate_limit_info": (("gateway_info",), ("rate_limits",)),
+    "export_message_history": (("guild_channels",), ("message_history",)),
+}
+
+# Exporters that are only run when explicitly requested
+OPT_IN_EXPORTERS = ("export_message_history",)
+
+# Position of each component in the saved export
+COMPONENT_ORDER = [key for _, provides in EXPORT_GRAPH.values() for key in provides]
+
+# Exporters that only read the item counts of their inputs, so streamed
+# components don't have to stay in memory for them
+COUNT_ONLY_EXPORTERS = ("export_bot_usage_stats",)
+
+# Per-guild sub-resources fetched by the guild pipeline: exporter -> (export_data key, endpoint)
+GUILD_RESOURCES = {
+    "export_commands": ("guild_commands", "/applications/{application_id}/guilds/{guild_id}/commands"),
+    "export_permissions": ("guild_permissions", "/applications/{application_id}/guilds/{guild_id}/commands/permissions"),
+    "export_channels": ("guild_channels", "/guilds/{guild_id}/channels"),
+    "export_webhooks": ("guild_webhooks", "/guilds/{guild_id}/webhooks"),
+    "export_emoji": ("guild_emojis", "/guilds/{guild_id}/emojis"),
+    "export_stickers": ("guild_stickers", "/guilds/{guild_id}/stickers"),
+    "export_scheduled_events": ("guild_events", "/guilds/{guild_id}/scheduled-events"),
+    "export_invites": ("guild_invites", "/guilds/{guild_id}/invites"),
+    "export_bans": ("guild_bans", "/guilds/{guild_id}/bans"),
+    "export_audit_logs": ("guild_audit_logs", "/guilds/{guild_id}/audit-logs?limit=100"),
+    "export_widget_settings": ("guild_widgets", "/guilds/{guild_id}/widget"),
+    "export_integrations": ("guild_integrations", "/guilds/{guild_id}/integrations"),
+    "export_templates": ("guild_templates", "/guilds/{guild_id}/templates"),
+    "export_welcome_screens": ("guild_welcome_screens", "/guilds/{guild_id}/welcome-screen"),
+    "export_auto_moderation": ("guild_auto_mod_rules", "/guilds/{guild_id}/auto-moderation/rules"),
+}
+
+# Per-guild sub-resources embedded in the /guilds/{id} payload: export_data key -> guild field
+DERIVED_GUILD_RESOURCES = {
+    "guild_emojis": "emojis",
+    "guild_stickers": "stickers",
+}
+
+# Components keyed by guild ID
+PER_GUILD_COMPONENTS = tuple(key for key, _ in GUILD_RESOURCES.values()) + ("guild_roles", "guild_voice_states")
+
+# Exporters summarising other components, run once on the merged result of a sharded export
+SHARD_AGGREGATE_EXPORTERS = ("export_message_stats", "export_intents_info", "export_bot_usage_stats")
+
+# Per-guild components that can change without an audit log entry, refetched even for unchanged guilds
+VOLATILE_GUILD_COMPONENTS = ("guild_commands", "guild_invites", "guild_templates")
+# List components of guild payloads, compared guild by guild in a delta
+GUILD_LIST_COMPONENTS = ("guilds", "detailed_guilds")
+# Guild fields that change all the time, ignored when deciding whether a guild changed
+VOLATILE_GUILD_FIELDS = ("approximate_member_count", "approximate_presence_count")
+
+def component_position(key: str) -> int:
+    """Sort key placing components in the declared export order, metadata last"""
+    return COMPONENT_ORDER.index(key) if key in COMPONENT_ORDER else len(COMPONENT_ORDER)
+
+def resolve_exporters(names: List[str]) -> List[str]:
+    """Expand exporter names with the exporters producing the components they read
+
+    Names may omit the export_ prefix. The result keeps the EXPORT_GRAPH order.
+    """
+    producers = {}
+    for name, (_, provides) in EXPORT_GRAPH.items():
+        for key in provides:
+            producers.setdefault(key, name)
+    
+    selected = set()
+    pending = []
+    for name in names:
+        name = name.strip()
+        if not name:
+            continue
+        if not name.startswith("export_"):
+            name = f"export_{name}"
+        if name == "export_metadata":
+            # Metadata is added to every export
+            continue
+        if name not in EXPORT_GRAPH:
+            raise ValueError(f"Unknown export function: {name}")
+        pending.append(name)
+    
+    while pending:
+        name = pending.pop()
+        if name in selected:
+            continue
+        selected.add(name)
+        pending.extend(producers[key] for key in EXPORT_GRAPH[name][0] if key in producers)
+    return [name for name in EXPORT_GRAPH if name in selected]
+
+def parse_datetime(value: str) -> datetime.datetime:
+    """Parse an ISO format date for argparse, rejecting anything else with a usage error"""
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid ISO format date: '{value}'")
+
+def token_bot_id(token: str) -> Optional[str]:
+    """Return the ID of the bot a token belongs to, the token's first part is the ID in base64
+
+    A first part that doesn't decode to an ID is returned as it is.
+    """
+    part = token.split('.')[0]
+    if not part:
+        return None
+    try:
+        decoded = base64.b64decode(part + "=" * (-len(part) % 4), validate=True).decode('ascii')
+    except ValueError:
+        return part
+    return decoded if decoded.isdigit() else part
+
+def datetime_to_snowflake(value: datetime.datetime) -> int:
+    """Convert a datetime to the lowest snowflake that could have been created at that time"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return max(0, int(value.timestamp() * 1000) - DISCORD_EPOCH) << 22
+
+def load_json(data: Union[bytes, str]) -> Any:
+    """Decode JSON from raw bytes or text with orjson when installed"""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dump_json(value: Any, indent: Optional[int] = None) -> bytes:
+    """Encode a value as UTF-8 JSON bytes with orjson when installed
+
+    orjson only indents by two spaces, other indents fall back to the json module.
+    """
+    if orjson and indent in (None, 2):
+        options = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(value, option=options)
+    return json.dumps(value, indent=indent).encode('utf-8')
+
+def write_ndjson(f, records: List[Any]) -> int:
+    """Append records to a binary NDJSON file, returning the number written"""
+    f.write(b"".join(dump_json(record) + b"\n" for record in records))
+    return len(records)
+
+def write_gzip_member(f, records: List[Any]) -> int:
+    """Append records to a binary file as one gzip member of NDJSON, returning the number written"""
+    if records:
+        f.write(gzip.compress(b"".join(dump_json(record) + b"\n" for record in records)))
+    return len(records)
+
+def count_items(value: Any) -> int:
+    """Count the records in an exported component or in one guild's slice of it"""
+    if isinstance(value, list):
+        return len(value)
+    if isinstance(value, dict):
+        if 'audit_log_entries' in value:
+            return len(value['audit_log_entries'])
+        return 1 if value else 0
+    return 0 if value is None else 1
+
+def latest_audit_log_entry(audit_log: Dict[str, Any]) -> str:
+    """ID of the newest entry of an audit log response, empty when it has none"""
+    entries = [entry.get('id') for entry in audit_log.get('audit_log_entries', []) if entry.get('id')]
+    return max(entries, key=int) if entries else ""
+
+def strip_volatile_fields(guild: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a guild list entry without the fields that change all the time"""
+    return {field: value for field, value in guild.items() if field not in VOLATILE_GUILD_FIELDS}
+
+def compute_delta(previous: "ExportSnapshot", current: "ExportSnapshot",
+                  components: Optional[Set[str]] = None, partial: Set[str] = frozenset()) -> Dict[str, Any]:
+    """Compare two exports component by component, and guild by guild where components are per guild
+
+    Only one component of each export is loaded at a time. When components is
+    given, the others are not compared, so components a partial export did not
+    select are not reported as removed. Guilds missing from a partial component,
+    one with failed requests, are not reported as removed either.
+    """
+    changed = {}
+    for key in current.keys():
+        if components is not None and key not in components:
+            continue
+        value = current.load(key)
+        old = previous.load(key)
+        if key in GUILD_LIST_COMPONENTS and isinstance(value, list) and isinstance(old, list):
+            old_by_id = {guild.get('id'): guild for guild in old}
+            new_ids = {guild.get('id') for guild in value}
+            guilds = [guild for guild in value if old_by_id.get(guild.get('id')) != guild]
+            removed = [guild_id for guild_id in old_by_id if guild_id not in new_ids]
+        elif key in PER_GUILD_COMPONENTS and isinstance(value, dict) and isinstance(old, dict):
+            guilds = {guild_id: guild_slice for guild_id, guild_slice in value.items() if old.get(guild_id) != guild_slice}
+            removed = [guild_id for guild_id in old if guild_id not in value]
+        else:
+            if old != value:
+                changed[key] = value
+            continue
+        if key in partial or 'guilds' in partial:
+            # Guilds missing from a cut short guild list or from failed requests may still be there
+            removed = []
+        if guilds or removed:
+            changed[key] = {"changed_guilds": guilds, "removed_guilds": removed}
+    
+    return {
+        "base_export_time": (previous.load('metadata') or {}).get('export_time'),
+        "export_time": (current.load('metadata') or {}).get('export_time'),
+        "changed": changed,
+        "removed": [
+            key for key in previous.keys()
+            if key not in current.keys() and key not in partial and (components is None or key in components)
+        ]
+    }
+
+def get_route_key(method: str, endpoint: str) -> Tuple[str, str]:
+    """Split an endpoint into a route template and its major parameter
+
+    Discord scopes rate limits per route and per major parameter (channel,
+    guild or webhook), so '/guilds/1/bans' and '/guilds/2/bans' share a route
+    but not a bucket.
+    """
+    parts = endpoint.split('?', 1)[0].strip('/').split('/')
+    template = []
+    major = []
+    for index, part in enumerate(parts):
+        previous = parts[index - 1] if index else ""
+        if previous in MAJOR_PARAMETERS and part.isdigit():
+            if not major:
+                major.append(part)
+            template.append("{id}")
+        elif previous == "webhooks" or (index >= 2 and parts[index - 2] == "webhooks" and parts[index - 1].isdigit()):
+            # Webhook tokens are part of the major parameter
+            major.append(part)
+            template.append("{token}")
+        elif previous == "reactions":
+            template.append("{emoji}")
+        elif part.isdigit():
+            template.append("{id}")
+        else:
+            template.append(part)
+    return f"{method} /{'/'.join(template)}", ":".join(major)
+
+class RequestFailed(Exception):
+    """A request that got no successful response, raised by make_request(strict=True)"""
+
+    def __init__(self, method: str, endpoint: str, status: Optional[int] = None):
+        super().__init__(f"{method} {endpoint} failed" + (f" with status {status}" if status else ""))
+        self.status = status
+
+# The requests that failed while the current exporter ran, so it isn't journaled as complete
+FAILED_REQUESTS = contextvars.ContextVar("dc_failed_requests", default=None)
+
+class RetryPolicy:
+    """Decide how long to wait before retrying a request and keep metrics of every retry
+
+    Server and network errors back off exponentially with full jitter, so
+    concurrent requests failing together don't retry together, and draw from a
+    retry budget shared by the whole run. 429 responses wait exactly as long as
+    Discord asks and don't use the budget, but a request stops after
+    rate_limit_attempts of them.
+    """
+
+    def __init__(self, attempts: int = RETRY_ATTEMPTS, base_delay: float = RETRY_BASE_DELAY,
+                 max_delay: float = RETRY_MAX_DELAY, budget: int = RETRY_BUDGET,
+                 rate_limit_attempts: int = RATE_LIMIT_MAX_RETRIES):
+        self.attempts = attempts
+        self.rate_limit_attempts = rate_limit_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.metrics = {
+            "retries": 0,
+            "global_rate_limits": 0,
+            "route_rate_limits": 0,
+            "shared_rate_limits": 0,
+            "server_errors": 0,
+            "network_errors": 0,
+            "budget_exhausted": 0,
+            "rate_limit_retries_exhausted": 0,
+            "retry_wait_seconds": 0.0
+        }
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter delay before retry number attempt (0-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def should_retry(self, attempt: int) -> bool:
+        """Whether an error retry is allowed, taking it from the run's budget"""
+        if attempt >= self.attempts - 1:
+            return False
+        if self.budget <= 0:
+            self.metrics["budget_exhausted"] += 1
+            return False
+        self.budget -= 1
+        return True
+
+    def should_retry_rate_limit(self, retries: int) -> bool:
+        """Whether a request rate limited after retries earlier 429 retries may wait and try again"""
+        if retries >= self.rate_limit_attempts:
+            self.metrics["rate_limit_retries_exhausted"] += 1
+            return False
+        return True
+
+    def rate_limit_delay(self, headers, body: Any) -> Tuple[float, str]:
+        """Return the exact wait of a 429 response and its scope: global, user or shared"""
+        retry_after = None
+        for value in (headers.get('Retry-After'), body.get('retry_after') if isinstance(body, dict) else None,
+                      headers.get('X-RateLimit-Reset-After')):
+            try:
+                retry_after = float(value)
+                break
+            except (TypeError, ValueError):
+                continue
+        if retry_after is None:
+            retry_after = RATE_LIMIT_RETRY_DELAY
+        
+        scope = headers.get('X-RateLimit-Scope', 'user')
+        if headers.get('X-RateLimit-Global', '').lower() == 'true' or (isinstance(body, dict) and body.get('global')):
+            scope = 'global'
+        return max(0.0, retry_after), scope
+
+    def record(self, reason: str, delay: float):
+        """Count a retry of a request"""
+        self.metrics["retries"] += 1
+        self.metrics[reason] = self.metrics.get(reason, 0) + 1
+        self.metrics["retry_wait_seconds"] = round(self.metrics["retry_wait_seconds"] + delay, 3)
+
+class RequestStats:
+    """Per-route request counts, bytes, latencies, retries and rate limit waits, and per-exporter wall time
+
+    Latency percentiles are computed from a bounded random sample per route.
+    """
+
     def __init__(self):
+        self.routes: Dict[str, Dict[str, Any]] = {}
+        self.exporters: Dict[str, float] = {}
+
+    def get_route(self, method: str, endpoint: str) -> Dict[str, Any]:
+        route, _ = get_route_key(method, endpoint)
+        stats = self.routes.get(route)
+        if stats is None:
+            stats = self.routes[route] = {
+                "requests": 0, "bytes": 0, "errors": 0, "retries": 0, "rate_limited": 0,
+                "rate_limit_wait": 0.0, "latency_total": 0.0, "latency_samples": []
+            }
+        return stats
+
+    def record(self, method: str, endpoint: str, status: Optional[int], size: int, latency: float):
+        """Count a sent request; status is None when it failed without a response"""
+        stats = self.get_route(method, endpoint)
+        stats["requests"] += 1
+        stats["bytes"] += size
+        stats["latency_total"] += latency
+        if status is None or status >= 400:
+            stats["errors"] += 1
+        samples = stats["latency_samples"]
+        if len(samples) < LATENCY_SAMPLE_SIZE:
+            samples.append(latency)
+        else:
+            # Reservoir sampling keeps every request equally likely to be in the sample
+            index = random.randrange(stats["requests"])
+            if index < LATENCY_SAMPLE_SIZE:
+                samples[index] = latency
+
+    def record_wait(self, method: str, endpoint: str, seconds: float):
+        if seconds > 0.001:
+            self.get_route(method, endpoint)["rate_limit_wait"] += seconds
+
+    def record_retry(self, method: str, endpoint: str, rate_limited: bool = False):
+        stats = self.get_route(method, endpoint)
+        stats["retries"] += 1
+        if rate_limited:
+            stats["rate_limited"] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Route and exporter tables for the export metadata, slowest routes first"""
+        routes = {}
+        for route, stats in sorted(self.routes.items(), key=lambda item: -item[1]["latency_total"]):
+            samples = sorted(stats["latency_samples"])
+            
+            def percentile(fraction):
+                return round(samples[min(len(samples) - 1, int(fraction * len(samples)))], 4) if samples else None
+            
+            routes[route] = {
+                "requests": stats["requests"],
+                "bytes": stats["bytes"],
+                "errors": stats["errors"],
+                "retries": stats["retries"],
+                "rate_limited": stats["rate_limited"],
+                "rate_limit_wait": round(stats["rate_limit_wait"], 3),
+                "latency_total": round(stats["latency_total"], 3),
+                "latency_p50": percentile(0.5),
+                "latency_p90": percentile(0.9),
+                "latency_p99": percentile(0.99),
+                "latency_max": round(samples[-1], 4) if samples else None
+            }
+        return {
+            "total_requests": sum(stats["requests"] for stats in self.routes.values()),
+            "total_bytes": sum(stats["bytes"] for stats in self.routes.values()),
+            "routes": routes,
+            "exporters": dict(sorted(self.exporters.items(), key=lambda item: -item[1]))
+        }
+
+    def print_summary(self, limit: int = 15):
+        """Print the slowest routes and exporters"""
+        summary = self.summary()
+        print(f"\n{Fore.CYAN}========== REQUEST STATS =========={Style.RESET_ALL}")
+        print(f"{summary['total_requests']} requests, {summary['total_bytes'] / 1048576:.1f} MiB received")
+        print(f"{'Route':<56}{'Reqs':>7}{'p50':>8}{'p90':>8}{'p99':>8}{'Retry':>7}{'429':>6}{'RL wait':>9}")
+        for route, stats in list(summary["routes"].items())[:limit]:
+            p50, p90, p99 = (f"{value * 1000:.0f}ms" if value is not None else "-"
+                             for value in (stats["latency_p50"], stats["latency_p90"], stats["latency_p99"]))
+            print(f"{route[:55]:<56}{stats['requests']:>7}{p50:>8}{p90:>8}{p99:>8}"
+                  f"{stats['retries']:>7}{stats['rate_limited']:>6}{stats['rate_limit_wait']:>8.1f}s")
+        print(f"\n{'Exporter':<56}{'Wall time':>10}")
+        for name, seconds in list(summary["exporters"].items())[:limit]:
+            print(f"{name:<56}{seconds:>9.2f}s")
+
+class ConcurrencyController:
+    """AIMD limit on the number of requests in flight
+
+    The limit grows by one request for every limit's worth of healthy responses
+    and is cut multiplicatively, at most once per cooldown, on 429s, server or
+    network errors, or when a route's smoothed latency rises well above the best
+    latency seen on that route. Latencies are measured up to the response
+    headers, so large bodies and slow routes don't look like congestion.
+    """
+
+    def __init__(self, initial: int = DEFAULT_CONCURRENCY, maximum: int = DEFAULT_MAX_CONCURRENCY, minimum: int = 1):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.initial = max(self.minimum, min(initial, self.maximum))
+        self.limit = float(self.initial)
+        self.in_flight = 0
+        self.waiters = collections.deque()
+        # Best and smoothed latency of every route
+        self.route_latencies: Dict[str, List[float]] = {}
+        self.smoothed_latency = None
+        self.started = time.monotonic()
+        self.last_decrease = 0.0
+        self.decreases = 0
+        self.history = [(0.0, self.initial)]
+
+    async def acquire(self):
+        """Wait for a free request slot"""
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self.waiters:
+                    self.waiters.remove(waiter)
+                else:
+                    # Pass the wake-up on to the next waiter
+                    self.wake()
+                raise
+        self.in_flight += 1
+
+    def release(self, route: str, latency: float, status: Optional[int]):
+        """Free a slot and adjust the limit to the outcome; status is None after a network error"""
+        self.in_flight -= 1
+        
+        if status is not None and status != 429 and status < 500:
+            self.smoothed_latency = latency if self.smoothed_latency is None else 0.9 * self.smoothed_latency + 0.1 * latency
+            baseline = self.route_latencies.setdefault(route, [latency, latency])
+            baseline[0] = min(baseline[0], latency)
+            baseline[1] = 0.9 * baseline[1] + 0.1 * latency
+            if baseline[1] <= baseline[0] * LATENCY_TOLERANCE + LATENCY_SLACK:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            else:
+                self.decrease()
+        else:
+            self.decrease()
+        
+        if int(self.limit) != self.history[-1][1]:
+            self.history.append((round(time.monotonic() - self.started, 3), int(self.limit)))
+            del self.history[:-CONCURRENCY_HISTORY_SIZE]
+        self.wake()
+
+    def decrease(self):
+        """Cut the limit, once per cooldown so one burst of failures counts once"""
+        now = time.monotonic()
+        if now - self.last_decrease < max(1.0, self.smoothed_latency or 0):
+            return
+        self.last_decrease = now
+        self.decreases += 1
+        self.limit = max(self.minimum, self.limit * CONCURRENCY_DECREASE_FACTOR)
+        for baseline in self.route_latencies.values():
+            # Let the latency baselines follow lasting changes of the network
+            baseline[0] *= 1.1
+
+    def wake(self):
+        """Wake as many waiters as there are free slots"""
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Current limit and its history for the export metadata"""
+        return {
+            "initial_limit": self.initial,
+            "max_limit": self.maximum,
+            "current_limit": int(self.limit),
+            "peak_limit": max(limit for _, limit in self.history),
+            "decreases": self.decreases,
+            "smoothed_latency": round(self.smoothed_latency, 4) if self.smoothed_latency is not None else None,
+            "route_latencies": {
+                route: {"best": round(best, 4), "smoothed": round(smoothed, 4)}
+                for route, (best, smoothed) in self.route_latencies.items()
+            },
+            "history": self.history
+        }
+
+class ResponseCache:
+    """Persistent SQLite cache of GET responses for the routes listed in CACHE_TTLS
+
+    Entries are keyed by a hash of the token, method and endpoint, so bots never
+    see each other's responses and the token itself is not stored. The path of
+    every entry is kept next to it, so a write drops the cached copies of the
+    resource, of what lies below it and of the collections above it. SQLite
+    runs on a worker thread of its own, in the order the calls were made.
+    """
+
+    def __init__(self, path: str, refresh: bool = False):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(responses)")}
+        if columns and "path" not in columns:
+            # Entries of an older cache can't be invalidated by path, start over
+            self.connection.execute("DROP TABLE responses")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, identity TEXT NOT NULL, "
+            "path TEXT NOT NULL, stored_at REAL NOT NULL, body TEXT NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS responses_path ON responses (identity, path)")
+        self.connection.commit()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="dc-cache")
+        # Refreshing skips cached entries but still stores the new responses
+        self.refresh = refresh
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0}
+
+    @staticmethod
+    def get_key(identity: str, method: str, endpoint: str) -> str:
+        return hashlib.sha256(f"{identity}\n{method}\n{endpoint}".encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def get_path(endpoint: str) -> str:
+        return "/" + endpoint.split('?', 1)[0].strip('/')
+
+    async def run(self, func, *args):
+        """Run a database call on the cache's worker thread"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def read(self, key: str, ttl: float) -> Optional[str]:
+        row = self.connection.execute(
+            "SELECT body FROM responses WHERE key = ? AND stored_at >= ?", (key, time.time() - ttl)
+        ).fetchone()
+        return row[0] if row else None
+
+    def write(self, key: str, identity: str, path: str, body: str):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO responses (key, identity, path, stored_at, body) VALUES (?, ?, ?, ?, ?)",
+            (key, identity, path, time.time(), body)
+        )
+        self.connection.commit()
+
+    def delete(self, identity: str, path: str) -> int:
+        parts = path.strip('/').split('/')
+        parents = ["/" + "/".join(parts[:index]) for index in range(1, len(parts) + 1)]
+        cursor = self.connection.execute(
+            f"DELETE FROM responses WHERE identity = ? AND (path IN ({', '.join('?' * len(parents))}) "
+            f"OR substr(path, 1, ?) = ?)",
+            (identity, *parents, len(path) + 1, f"{path}/")
+        )
+        self.connection.commit()
+        return cursor.rowcount
+
+    async def get(self, key: str, ttl: float) -> Optional[Any]:
+        """Return a cached response younger than ttl seconds, or None"""
+        body = None if self.refresh else await self.run(self.read, key, ttl)
+        if body is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return load_json(body)
+
+    async def put(self, identity: str, endpoint: str, value: Any):
+        """Store the response of a GET endpoint"""
+        key = self.get_key(identity, "GET", endpoint)
+        await self.run(self.write, key, identity, self.get_path(endpoint), dump_json(value).decode('utf-8'))
+        self.stats["stores"] += 1
+
+    async def invalidate(self, identity: str, endpoint: str):
+        """Drop the cached responses a write to endpoint makes stale"""
+        self.stats["invalidations"] += await self.run(self.delete, identity, self.get_path(endpoint))
+
+    def close(self):
+        self.executor.submit(self.connection.close)
+        self.executor.shutdown(wait=True)
+
+class RequestCassette:
+    """Gzipped NDJSON recording of API responses that can stand in for the API
+
+    Recording writes one line per response received, rate limits and server
+    errors included, with its status, headers, body and latency but never the
+    token. Lines are buffered and encoded and compressed on a writer thread of
+    the cassette's own, so recording keeps the order of the responses.
+    Replaying serves every method, endpoint and request body its recorded
+    responses in order, and keeps repeating the last successful one once they
+    run out.
+    """
+
+    def __init__(self, path: str, replay: bool = False, pace: bool = False):
+        self.path = path
+        self.replaying = replay
+        # Paced replays wait out the recorded latencies and rate limits
+        self.pace = pace
+        self.started = time.monotonic()
+        self.responses: Dict[str, collections.deque] = {}
+        self.last_responses: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"recorded": 0, "replayed": 0, "missing": 0}
+        self.buffer: List[Dict[str, Any]] = []
+        self.writes: List[concurrent.futures.Future] = []
+        self.executor = None
+        if replay:
+            self.file = None
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = load_json(line)
+                        key = self.get_key(entry["method"], entry["endpoint"], entry.get("data"))
+                        self.responses.setdefault(key, collections.deque()).append(entry)
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.file = gzip.open(path, 'wb')
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="dc-cassette")
+
+    @staticmethod
+    def get_key(method: str, endpoint: str, data: Optional[Dict]) -> str:
+        return f"{method} {endpoint} {json.dumps(data, sort_keys=True) if data is not None else ''}"
+
+    def record(self, method: str, endpoint: str, data: Optional[Dict], status: int, headers, body: bytes,
+               started: float, latency: float):
+        entry = {
+            "method": method,
+            "endpoint": endpoint,
+            "data": data,
+            "status": status,
+            "headers": dict(headers),
+            "body": body.decode('utf-8', 'replace'),
+            "at": round(started - self.started, 4),
+            "latency": round(latency, 4)
+        }
+        self.buffer.append(entry)
+        self.stats["recorded"] += 1
+        if len(self.buffer) >= CASSETTE_BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Hand the buffered responses to the writer thread"""
+        if self.buffer:
+            # Finished writes are only kept if they failed, to be reported on close
+            self.writes = [write for write in self.writes if not write.done() or write.exception()]
+            self.writes.append(self.executor.submit(self.write_entries, self.buffer))
+            self.buffer = []
+
+    def write_entries(self, entries: List[Dict[str, Any]]):
+        self.file.write(b"".join(dump_json(entry) + b"\n" for entry in entries))
+
+    async def replay(self, method: str, endpoint: str, data: Optional[Dict]) -> Optional[Tuple[int, CIMultiDict, bytes]]:
+        """Return the next recorded status, headers and body of a request, or None if it was never recorded"""
+        key = self.get_key(method, endpoint, data)
+        queue = self.responses.get(key)
+        if queue:
+            entry = queue.popleft()
+            if entry["status"] < 400:
+                self.last_responses[key] = entry
+        else:
+            entry = self.last_responses.get(key)
+        if entry is None:
+            self.stats["missing"] += 1
+            return None
+        
+        self.stats["replayed"] += 1
+        if self.pace:
+            await asyncio.sleep(entry["latency"])
+        return entry["status"], CIMultiDict(entry["headers"]), entry["body"].encode('utf-8')
+
+    def close(self):
+        if self.file:
+            self.flush()
+            self.executor.shutdown(wait=True)
+            self.file.close()
+            self.file = None
+            for write in self.writes:
+                if write.exception():
+                    print(f"{Fore.RED}Failed to record cassette {self.path}: {str(write.exception())}{Style.RESET_ALL}")
+                    break
+
+class RateLimitBucket:
+    """State of a single Discord rate limit bucket"""
+
+    def __init__(self):
+        self.limit = None
+        self.remaining = None
+        self.reset_at = 0.0
+        # When the current window was started locally, responses to earlier requests describe the last one
+        self.window_started = 0.0
+        # Requests sent against the bucket whose responses haven't been processed yet
+        self.in_flight = 0
+        self.changed = asyncio.Event()
+
+    def notify(self):
+        """Wake every request waiting for the bucket state to change"""
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+class RateLimiter:
+    """Track Discord rate limit buckets and wait only when one is exhausted"""
+
+    def __init__(self, global_limit: int = GLOBAL_RATE_LIMIT):
+        self.global_limit = global_limit
+        self.global_window_start = 0.0
+        self.global_count = 0
+        self.global_reset_at = 0.0
+        self.global_lock = asyncio.Lock()
+        # Route template -> X-RateLimit-Bucket hash reported by Discord
+        self.route_buckets: Dict[str, str] = {}
+        # "<bucket hash or route>:<major parameter>" -> bucket state
+        self.buckets: Dict[str, RateLimitBucket] = {}
+
+    def get_bucket(self, method: str, endpoint: str) -> RateLimitBucket:
+        """Return the bucket a request will be counted against"""
+        route, major = get_route_key(method, endpoint)
+        key = f"{self.route_buckets.get(route, route)}:{major}"
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = RateLimitBucket()
+        return bucket
+
+    async def wait_global(self):
+        """Wait for the global per-bot request budget"""
+        async with self.global_lock:
+            while True:
+                now = time.monotonic()
+                if now < self.global_reset_at:
+                    await asyncio.sleep(self.global_reset_at - now)
+                    continue
+                if now - self.global_window_start >= 1:
+                    self.global_window_start = now
+                    self.global_count = 0
+                if self.global_count < self.global_limit:
+                    self.global_count += 1
+                    return
+                await asyncio.sleep(self.global_window_start + 1 - now)
+
+    async def acquire(self, method: str, endpoint: str) -> Optional[RateLimitBucket]:
+        """Wait until a request to the endpoint is allowed to be sent
+
+        Returns the bucket the request is counted against, to be passed to
+        release() once its response has been processed. While the state of a
+        bucket is unknown, or it is exhausted without a known reset time, only a
+        single probe request is sent and the others wait for its response.
+        """
+        await self.wait_global()
+        while True:
+            # The bucket can change once a response reveals the route's bucket hash
+            bucket = self.get_bucket(method, endpoint)
+            now = time.monotonic()
+            if bucket.reset_at and now >= bucket.reset_at:
+                # The window has rolled over since the last response
+                bucket.remaining = bucket.limit
+                bucket.reset_at = 0.0
+                bucket.window_started = now
+            if bucket.remaining is not None and bucket.remaining > 0:
+                bucket.remaining -= 1
+                bucket.in_flight += 1
+                return bucket
+            if bucket.remaining is not None and bucket.reset_at:
+                await asyncio.sleep(bucket.reset_at - now)
+                continue
+            if bucket.in_flight == 0:
+                bucket.in_flight += 1
+                return bucket
+            await bucket.changed.wait()
+
+    def release(self, bucket: Optional[RateLimitBucket]):
+        """Mark a request returned by acquire() as answered"""
+        if bucket is not None:
+            bucket.in_flight -= 1
+            bucket.notify()
+
+    def update(self, method: str, endpoint: str, headers, sent_at: Optional[float] = None):
+        """Update bucket state from the rate limit headers of a response to a request sent at sent_at"""
+        route, _ = get_route_key(method, endpoint)
+        bucket_hash = headers.get('X-RateLimit-Bucket')
+        if bucket_hash:
+            self.route_buckets[route] = bucket_hash
+        bucket = self.get_bucket(method, endpoint)
+        try:
+            limit = headers.get('X-RateLimit-Limit')
+            remaining = headers.get('X-RateLimit-Remaining')
+            reset_after = headers.get('X-RateLimit-Reset-After')
+            if limit is not None:
+                bucket.limit = int(limit)
+            if remaining is not None and reset_after is not None and (sent_at is None or sent_at >= bucket.window_started):
+                reset_at = time.monotonic() + float(reset_after)
+                remaining = int(remaining)
+                if bucket.remaining is None:
+                    bucket.remaining = remaining
+                else:
+                    # The local count already includes the requests Discord hasn't answered yet
+                    bucket.remaining = min(bucket.remaining, remaining)
+                bucket.reset_at = reset_at
+        except ValueError:
+            pass
+        bucket.notify()
+
+    def set_bucket_reset(self, method: str, endpoint: str, retry_after: float):
+        """Mark the bucket of an endpoint as exhausted until retry_after has passed"""
+        bucket = self.get_bucket(method, endpoint)
+        bucket.remaining = 0
+        bucket.reset_at = max(bucket.reset_at, time.monotonic() + retry_after)
+        bucket.notify()
+
+    def set_global_reset(self, retry_after: float):
+        """Block every request until a global rate limit has expired"""
+        self.global_reset_at = max(self.global_reset_at, time.monotonic() + retry_after)
+
+class SharedRateLimitStore:
+    """Rate limit state shared by every process using the same token
+
+    The state lives in a small JSON file that is locked with flock for each
+    read-modify-write, so concurrent processes draw from one global and one
+    per-bucket budget. Times are wall-clock seconds, comparable across processes.
+    """
+
+    def __init__(self, path: str):
+        if fcntl is None:
+            raise RuntimeError("A shared rate limit store needs a POSIX system")
+        self.path = path
+
+    @classmethod
+    def for_token(cls, token: str, directory: Optional[str] = None) -> "SharedRateLimitStore":
+        """Return the store of a token; the file name only contains a hash of it"""
+        directory = directory or tempfile.gettempdir()
+        os.makedirs(directory, exist_ok=True)
+        token_hash = hashlib.sha256(token.encode('utf-8')).hexdigest()[:16]
+        return cls(os.path.join(directory, f"dc-ratelimit-{token_hash}.json"))
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Lock the store and yield its state, writing it back afterwards"""
+        with open(self.path, 'a+', encoding='utf-8') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                content = f.read()
+                try:
+                    state = json.loads(content) if content else {}
+                except ValueError:
+                    state = {}
+                state.setdefault("global", {"window_start": 0.0, "count": 0, "reset_at": 0.0})
+                state.setdefault("buckets", {})
+                state.setdefault("routes", {})
+                yield state
+                
+                # Buckets past their reset are back to a full budget, no need to keep them
+                now = time.time()
+                state["buckets"] = {
+                    key: bucket for key, bucket in state["buckets"].items() if bucket["reset_at"] > now
+                }
+                f.seek(0)
+                f.truncate()
+                json.dump(state, f)
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def reserve(self, route: str, major: str, global_limit: int) -> float:
+        """Take one request from the global and bucket budgets, or return how long to wait first"""
+        with self.transaction() as state:
+            now = time.time()
+            global_state = state["global"]
+            if now < global_state["reset_at"]:
+                return global_state["reset_at"] - now
+            if now - global_state["window_start"] >= 1:
+                global_state["window_start"] = now
+                global_state["count"] = 0
+            if global_state["count"] >= global_limit:
+                return global_state["window_start"] + 1 - now
+            
+            bucket = state["buckets"].get(f"{state['routes'].get(route, route)}:{major}")
+            if bucket and bucket["reset_at"] > now:
+                if bucket["remaining"] <= 0:
+                    return bucket["reset_at"] - now
+                bucket["remaining"] -= 1
+            global_state["count"] += 1
+            return 0.0
+
+    def update(self, route: str, major: str, bucket_hash: Optional[str], remaining: int, reset_after: float):
+        """Record the bucket state reported by a response"""
+        with self.transaction() as state:
+            if bucket_hash:
+                state["routes"][route] = bucket_hash
+            key = f"{state['routes'].get(route, route)}:{major}"
+            reset_at = time.time() + reset_after
+            bucket = state["buckets"].get(key)
+            if bucket is None or reset_at > bucket["reset_at"] + 0.05:
+                # First response of a new window
+                state["buckets"][key] = {"remaining": remaining, "reset_at": reset_at}
+            else:
+                # Other processes may have reserved requests the response doesn't count yet
+                bucket["remaining"] = min(bucket["remaining"], remaining)
+                bucket["reset_at"] = reset_at
+
+    def set_bucket_reset(self, route: str, major: str, retry_after: float):
+        with self.transaction() as state:
+            key = f"{state['routes'].get(route, route)}:{major}"
+            reset_at = time.time() + retry_after
+            bucket = state["buckets"].get(key, {"reset_at": 0.0})
+            state["buckets"][key] = {"remaining": 0, "reset_at": max(bucket["reset_at"], reset_at)}
+
+    def set_global_reset(self, retry_after: float):
+        with self.transaction() as state:
+            state["global"]["reset_at"] = max(state["global"]["reset_at"], time.time() + retry_after)
+
+class SharedRateLimiter(RateLimiter):
+    """Rate limiter drawing from a SharedRateLimitStore instead of in-process state
+
+    The store blocks on its file lock while another process holds it, so every
+    store call runs on a worker thread of its own, in the order it was made.
+    Updates from responses are not waited for.
+    """
+
+    def __init__(self, store: SharedRateLimitStore, global_limit: int = GLOBAL_RATE_LIMIT):
+        super().__init__(global_limit)
+        self.store = store
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="dc-ratelimit")
+
+    def submit(self, func, *args) -> asyncio.Future:
+        """Run a store call on the store's worker thread"""
+        future = asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        # A failed update only loses rate limit state, retrieved here so it isn't reported unhandled
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return future
+
+    async def acquire(self, method: str, endpoint: str):
+        route, major = get_route_key(method, endpoint)
+        while True:
+            wait = await self.submit(self.store.reserve, route, major, self.global_limit)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def update(self, method: str, endpoint: str, headers, sent_at: Optional[float] = None):
+        route, major = get_route_key(method, endpoint)
+        try:
+            remaining = headers.get('X-RateLimit-Remaining')
+            reset_after = headers.get('X-RateLimit-Reset-After')
+            if remaining is not None and reset_after is not None:
+                self.submit(self.store.update, route, major, headers.get('X-RateLimit-Bucket'),
+                            int(remaining), float(reset_after))
+        except ValueError:
+            pass
+
+    def set_bucket_reset(self, method: str, endpoint: str, retry_after: float):
+        route, major = get_route_key(method, endpoint)
+        self.submit(self.store.set_bucket_reset, route, major, retry_after)
+
+    def set_global_reset(self, retry_after: float):
+        self.submit(self.store.set_global_reset, retry_after)
+
+class ExportWriter:
+    """Stream export components to disk as soon as they are produced
+
+    Complete components are written to <key>.json and per-guild components are
+    appended one guild at a time to <key>.ndjson, so only the manifest has to
+    stay in memory. assemble() joins the files into the usual JSON document.
+
+    Files are encoded and written on a writer thread of their own, in the order
+    they were handed over, while the manifest is kept on the caller's thread.
+    close() and every read wait for the writes.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.manifest: Dict[str, Dict[str, Any]] = {}
+        # Per-guild components still being written, their files are only touched by the writer thread
+        self.open_components: Set[str] = set()
+        self.streams = {}
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="dc-export-writer")
+        self.writes: List[concurrent.futures.Future] = []
+        os.makedirs(directory, exist_ok=True)
+
+    def submit(self, func, *args):
+        """Hand a write to the writer thread"""
+        self.writes.append(self.executor.submit(func, *args))
+
+    def wait(self):
+        """Wait for the writes handed to the writer thread, raising the first write that failed"""
+        writes, self.writes = self.writes, []
+        for write in writes:
+            write.result()
+
+    def write_component(self, key: str, value: Any):
+        """Write a complete component to its own file"""
+        filename = f"{key}.json"
+        self.submit(self.write_json, os.path.join(self.directory, filename), value)
+        self.manifest[key] = {"file": filename}
+
+    def write_json(self, path: str, value: Any):
+        with open(f"{path}.tmp", 'wb') as f:
+            f.write(dump_json(value, indent=2))
+        os.replace(f"{path}.tmp", path)
+
+    def write_guild_slice(self, key: str, guild_id: str, value: Any):
+        """Append one guild's slice of a per-guild component"""
+        if key not in self.open_components:
+            self.open_components.add(key)
+            self.manifest[key] = {"file": f"{key}.ndjson"}
+        self.submit(self.append_slice, key, guild_id, value)
+
+    def append_slice(self, key: str, guild_id: str, value: Any):
+        stream = self.streams.get(key)
+        if stream is None:
+            stream = self.streams[key] = open(os.path.join(self.directory, f"{key}.ndjson"), 'wb')
+        stream.write(dump_json([guild_id, value]) + b"\n")
+        stream.flush()
+
+    def close_component(self, key: str):
+        """Finish a per-guild component once every guild has been written"""
+        if key in self.open_components:
+            self.open_components.discard(key)
+            self.submit(self.close_stream, key)
+
+    def close_stream(self, key: str):
+        stream = self.streams.pop(key, None)
+        if stream:
+            stream.close()
+
+    def close(self):
+        """Close every open component stream and wait for the writer thread"""
+        for key in list(self.open_components):
+            self.close_component(key)
+        self.wait()
+
+    def write_manifest(self, component_stats: Dict[str, Dict[str, int]]):
+        """Write the manifest describing every component file"""
+        components = {}
+        for key in sorted(self.manifest, key=component_position):
+            components[key] = dict(self.manifest[key], **component_stats.get(key, {}))
+        with open(os.path.join(self.directory, "manifest.json"), 'w', encoding='utf-8') as f:
+            json.dump({"components": components}, f, indent=2)
+
+    def assemble(self, out, pretty: bool = True):
+        """Write every component file into a single JSON document without loading them all
+
+        The document is indented by two spaces unless pretty is False.
+        """
+        self.close()
+        keys = sorted(self.manifest, key=component_position)
+        if not keys:
+            out.write("{}")
+            return
+        
+        # Separators of the components and of the guilds within a component
+        outer, inner = ("\n  ", "\n    ") if pretty else ("", "")
+        out.write("{")
+        for index, key in enumerate(keys):
+            out.write(("," if index else "") + f"{outer}{json.dumps(key)}:{' ' if pretty else ''}")
+            entry = self.manifest[key]
+            if not self.is_sliced(entry):
+                self.copy_component(entry, out, pretty)
+                continue
+            
+            slices = 0
+            for guild_id, value in self.iter_guild_slices(entry):
+                slice_json = dump_json(value, indent=2 if pretty else None).decode('utf-8').replace("\n", inner)
+                out.write(("," if slices else "{") + f"{inner}{json.dumps(guild_id)}:{' ' if pretty else ''}{slice_json}")
+                slices += 1
+            out.write(f"{outer}}}" if slices else "{}")
+        out.write("\n}" if pretty else "}")
+
+    def is_sliced(self, entry: Dict[str, Any]) -> bool:
+        """Whether a manifest entry was written guild by guild"""
+        return entry["file"].endswith(".ndjson")
+
+    def copy_component(self, entry: Dict[str, Any], out, pretty: bool = True):
+        """Copy a complete component file into the document, indented one level deeper"""
+        self.wait()
+        with open(os.path.join(self.directory, entry["file"]), 'r', encoding='utf-8') as f:
+            if not pretty:
+                out.write(dump_json(load_json(f.read())).decode('utf-8'))
+                return
+            for line_number, line in enumerate(f):
+                out.write(line if line_number == 0 else f"  {line}")
+
+    def read_component(self, entry: Dict[str, Any]) -> Any:
+        """Load a complete component file"""
+        self.wait()
+        with open(os.path.join(self.directory, entry["file"]), 'rb') as f:
+            return load_json(f.read())
+
+    def iter_guild_slices(self, entry: Dict[str, Any]):
+        """Yield (guild_id, slice) for every guild of a sliced component, reading one at a time"""
+        self.wait()
+        with open(os.path.join(self.directory, entry["file"]), 'rb') as f:
+            for line in f:
+                guild_id, value = load_json(line)
+                yield guild_id, value
+
+class PartitionedExportWriter(ExportWriter):
+    """Write the export as NDJSON partitions that can be read without loading the rest
+
+    Every component is written to <key>.ndjson, per-guild components to
+    guilds/<guild_id>/<key>.ndjson instead. Lists are written one item per line,
+    other values as a single line, and the manifest lists every partition with
+    its type so assemble() can still rebuild the usual JSON document.
+    """
+
+    def write_partition(self, filename: str, value: Any) -> Dict[str, Any]:
+        """Hand a partition to the writer thread and return its manifest entry"""
+        self.submit(self.write_file, os.path.join(self.directory, filename), value)
+        return {"file": filename, "type": "list" if isinstance(value, list) else "value"}
+
+    def write_file(self, path: str, value: Any):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.tmp", 'wb') as f:
+            if isinstance(value, list):
+                write_ndjson(f, value)
+            else:
+                f.write(dump_json(value) + b"\n")
+        os.replace(f"{path}.tmp", path)
+
+    def read_partition(self, entry: Dict[str, Any]) -> Any:
+        self.wait()
+        with open(os.path.join(self.directory, entry["file"]), 'rb') as f:
+            records = [load_json(line) for line in f]
+        return records if entry["type"] == "list" else records[0]
+
+    def write_component(self, key: str, value: Any):
+        """Write a complete component, partitioned by guild if it is a per-guild component"""
+        if key in PER_GUILD_COMPONENTS and isinstance(value, dict):
+            self.manifest[key] = {"partitions": {}}
+            for guild_id, guild_slice in value.items():
+                self.write_guild_slice(key, guild_id, guild_slice)
+        else:
+            self.manifest[key] = self.write_partition(f"{key}.ndjson", value)
+
+    def write_guild_slice(self, key: str, guild_id: str, value: Any):
+        """Write one guild's partition of a per-guild component"""
+        # Guild IDs come from the API, keep them from escaping the export directory
+        directory = re.sub(r'[^0-9A-Za-z_-]', '_', str(guild_id))
+        partitions = self.manifest.setdefault(key, {"partitions": {}})["partitions"]
+        partitions[guild_id] = self.write_partition(os.path.join("guilds", directory, f"{key}.ndjson"), value)
+
+    def is_sliced(self, entry: Dict[str, Any]) -> bool:
+        return "partitions" in entry
+
+    def copy_component(self, entry: Dict[str, Any], out, pretty: bool = True):
+        out.write(dump_json(self.read_partition(entry), indent=2 if pretty else None).decode('utf-8').replace("\n", "\n  "))
+
+    def read_component(self, entry: Dict[str, Any]) -> Any:
+        return self.read_partition(entry)
+
+    def iter_guild_slices(self, entry: Dict[str, Any]):
+        for guild_id, partition in entry["partitions"].items():
+            yield guild_id, self.read_partition(partition)
+
+class ExportSnapshot:
+    """Read an export one component at a time
+
+    Wraps the components of a finished export, either in memory or as written by
+    an export writer. open() reads a previous export: a JSON file is loaded as a
+    whole, a --stream-dir or ndjson directory only through its manifest, so a
+    component is read from disk when it is asked for.
+    """
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None, reader: Optional[ExportWriter] = None):
+        self.data = data if reader is None else None
+        self.reader = reader
+        # Byte offset of every guild in the NDJSON file of a sliced component
+        self.slice_offsets: Dict[str, Dict[str, int]] = {}
+        # Slices are loaded from offload workers, only one of them indexes a file
+        self.index_lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path: str) -> "ExportSnapshot":
+        """Open a previous export file or export directory"""
+        if not os.path.isdir(path):
+            with open(path, 'rb') as f:
+                return cls(data=load_json(f.read()))
+        with open(os.path.join(path, "manifest.json"), 'rb') as f:
+            manifest = load_json(f.read())["components"]
+        partitioned = any("partitions" in entry or "type" in entry for entry in manifest.values())
+        reader = (PartitionedExportWriter if partitioned else ExportWriter)(path)
+        reader.manifest = manifest
+        return cls(reader=reader)
+
+    def keys(self) -> List[str]:
+        """Keys of every component in the export"""
+        return list(self.data if self.reader is None else self.reader.manifest)
+
+    def load(self, key: str) -> Any:
+        """Load one component, None when the export doesn't have it"""
+        if self.reader is None:
+            return self.data.get(key)
+        entry = self.reader.manifest.get(key)
+        if entry is None:
+            return None
+        if self.reader.is_sliced(entry):
+            return dict(self.reader.iter_guild_slices(entry))
+        return self.reader.read_component(entry)
+
+    def load_guild_slice(self, key: str, guild_id: str) -> Any:
+        """Load one guild's slice of a per-guild component, None when the export doesn't have the component"""
+        if self.reader is None:
+            if key not in self.data:
+                return None
+            # Guilds without data were left out of the component
+            return self.data[key].get(guild_id, [])
+        entry = self.reader.manifest.get(key)
+        if entry is None:
+            return None
+        if not self.reader.is_sliced(entry):
+            # Written as a whole, as a component without any guild is
+            return (self.reader.read_component(entry) or {}).get(guild_id, [])
+        if "partitions" in entry:
+            partition = entry["partitions"].get(guild_id)
+            return self.reader.read_partition(partition) if partition else []
+        
+        path = os.path.join(self.reader.directory, entry["file"])
+        offsets = self.index_slices(key, path)
+        if guild_id not in offsets:
+            return []
+        with open(path, 'rb') as f:
+            f.seek(offsets[guild_id])
+            return load_json(f.readline())[1]
+
+    def index_slices(self, key: str, path: str) -> Dict[str, int]:
+        """Index the NDJSON file of a sliced component once, so a slice is read by seeking straight to it"""
+        with self.index_lock:
+            offsets = self.slice_offsets.get(key)
+            if offsets is None:
+                offsets = {}
+                position = 0
+                with open(path, 'rb') as f:
+                    for line in f:
+                        offsets[load_json(line)[0]] = position
+                        position += len(line)
+                self.slice_offsets[key] = offsets
+            return offsets
+
+class ExportJournal:
+    """Checkpoint journal of the export units that are already complete
+
+    Every finished exporter, guild slice and pagination cursor is appended as one
+    record to journal.ndjson, and its data is kept next to it, so an interrupted
+    export can be resumed without requesting those units again.
+    """
+
+    def __init__(self, directory: str, bot_id: Optional[str], resume: bool = False):
+        self.directory = directory
+        self.path = os.path.join(directory, "journal.ndjson")
+        self.completed_exporters: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.slice_offsets: Dict[str, Dict[str, int]] = {}
+        self.cursors: Dict[str, Dict[str, Any]] = {}
+        self.slice_files = {}
+        os.makedirs(os.path.join(directory, "components"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "slices"), exist_ok=True)
+
+        if resume and os.path.exists(self.path):
+            self.load(bot_id)
+            self.file = open(self.path, 'a', encoding='utf-8')
+        else:
+            # A new journal starts without any slices of an earlier run
+            for filename in os.listdir(os.path.join(directory, "slices")):
+                os.remove(os.path.join(directory, "slices", filename))
+            self.file = open(self.path, 'w', encoding='utf-8')
+            self.record({"unit": "run", "bot_id": bot_id, "started": datetime.datetime.now().isoformat()})
+
+    def load(self, bot_id: Optional[str]):
+        """Read the units completed by earlier runs"""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # The last record may have been cut off by the interruption
+                    break
+                unit = record.get("unit")
+                if unit == "run" and record.get("bot_id") != bot_id:
+                    raise ValueError(f"Journal {self.directory} belongs to bot {record.get('bot_id')}, not {bot_id}")
+                elif unit == "exporter":
+                    self.completed_exporters[record["name"]] = record["components"]
+                elif unit == "slice":
+                    self.slice_offsets.setdefault(record["component"], {})[record["guild_id"]] = record["offset"]
+                elif unit == "cursor":
+                    self.cursors[record["name"]] = record
+
+    def record(self, record: Dict[str, Any]):
+        """Append a record and flush it so it survives a crash"""
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def is_exporter_done(self, name: str) -> bool:
+        return name in self.completed_exporters
+
+    def mark_exporter_done(self, name: str, components: Dict[str, Dict[str, Any]]):
+        """Record a finished exporter with the stats of the components it produced"""
+        self.completed_exporters[name] = components
+        self.record({"unit": "exporter", "name": name, "components": components})
+
+    def save_component(self, key: str, value: Any):
+        """Keep a complete component until its exporter is recorded as done"""
+        path = os.path.join(self.directory, "components", f"{key}.json")
+        with open(f"{path}.tmp", 'wb') as f:
+            f.write(dump_json(value))
+        os.replace(f"{path}.tmp", path)
+
+    def load_component(self, key: str) -> Any:
+        with open(os.path.join(self.directory, "components", f"{key}.json"), 'rb') as f:
+            return load_json(f.read())
+
+    def has_guild_slice(self, key: str, guild_id: str) -> bool:
+        return guild_id in self.slice_offsets.get(key, {})
+
+    def save_guild_slice(self, key: str, guild_id: str, value: Any):
+        """Keep one guild's slice of a per-guild component, empty results included"""
+        f = self.slice_files.get(key)
+        if f is None:
+            f = self.slice_files[key] = open(os.path.join(self.directory, "slices", f"{key}.ndjson"), 'ab')
+        offset = f.tell()
+        f.write(dump_json(value) + b"\n")
+        f.flush()
+        self.slice_offsets.setdefault(key, {})[guild_id] = offset
+        self.record({"unit": "slice", "component": key, "guild_id": guild_id, "offset": offset})
+
+    def load_guild_slice(self, key: str, guild_id: str) -> Any:
+        with open(os.path.join(self.directory, "slices", f"{key}.ndjson"), 'rb') as f:
+            f.seek(self.slice_offsets[key][guild_id])
+            return load_json(f.readline())
+
+    def iter_guild_slices(self, key: str):
+        """Yield (guild_id, slice) for every recorded slice of a component, reading one at a time"""
+        offsets = self.slice_offsets.get(key, {})
+        if not offsets:
+            return
+        with open(os.path.join(self.directory, "slices", f"{key}.ndjson"), 'rb') as f:
+            for guild_id, offset in offsets.items():
+                f.seek(offset)
+                yield guild_id, load_json(f.readline())
+
+    def get_cursor(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.cursors.get(name)
+
+    def save_cursor(self, name: str, cursor: Any, count: int, offset: int, done: bool = False):
+        """Record how far a paginated unit got and how many bytes of its file are complete"""
+        record = {"unit": "cursor", "name": name, "cursor": cursor, "count": count, "offset": offset, "done": done}
+        self.cursors[name] = record
+        self.record(record)
+
+    def close(self):
+        for f in self.slice_files.values():
+            f.close()
+        self.slice_files = {}
+        self.file.close()
+
+def create_connector(pool_size: int = DEFAULT_POOL_SIZE,
+                     pool_size_per_host: int = DEFAULT_POOL_SIZE_PER_HOST) -> aiohttp.TCPConnector:
+    """Create the pooled connector used for API requests"""
+    return aiohttp.TCPConnector(
+        limit=pool_size,
+        limit_per_host=pool_size_per_host,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        # A shared SSL context lets new connections resume earlier TLS sessions
+        ssl=ssl.create_default_context()
+    )
+
+class DiscordExporter:
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, pool_size: int = DEFAULT_POOL_SIZE,
+                 pool_size_per_host: int = DEFAULT_POOL_SIZE_PER_HOST, request_timeout: float = REQUEST_TIMEOUT,
+                 stream_dir: Optional[str] = None, data_dir: Optional[str] = None,
+                 message_since: Optional[int] = None, message_until: Optional[int] = None,
+                 connector: Optional[aiohttp.TCPConnector] = None, shared_ratelimit_dir: Optional[str] = None,
+                 max_concurrency: Optional[int] = None, cache_file: Optional[str] = None, refresh_cache: bool = False,
+                 record_file: Optional[str] = None, replay_file: Optional[str] = None, replay_pace: bool = False,
+                 output_format: str = "json", exit_on_auth_failure: bool = True):
         self.token = None
         self.bot_id = None
         self.headers = {}
         self.session = None
+        # Connection pool shared with the other bots of a batch export
+        self.connector = connector
+        # Directory of the rate limit store shared with other processes ("" for the default), None if disabled
+        self.shared_ratelimit_dir = shared_ratelimit_dir
+        # Guild list entries assigned to this process by a sharded export
+        self.shard_guilds: Optional[List[Dict]] = None
+        # Set on every shard but the first, which alone exports the components that don't depend on guilds
+        self.guilds_only_shard = False
+        # Otherwise an invalid token only stops this exporter, as a batch of bots needs
+        self.exit_on_auth_failure = exit_on_auth_failure
+        self.auth_failed = False
+        self.pool_size = pool_size
+        self.pool_size_per_host = pool_size_per_host
+        self.request_timeout = request_timeout
         self.is_token_auth = False
         self.export_data = {}
+        # Item and guild counts of every exported component, also when it is streamed to disk
+        self.component_stats: Dict[str, Dict[str, int]] = {}
+        self.output_format = output_format
+        if output_format == "ndjson":
+            # Without a directory the export is named by open_default_writer() once the bot is known
+            self.writer = PartitionedExportWriter(stream_dir) if stream_dir else None
+        else:
+            self.writer = ExportWriter(stream_dir) if stream_dir else None
+        # Checkpoint journal of completed units, set up once the bot is known
+        self.journal: Optional[ExportJournal] = None
+        self.data_dir = data_dir
+        # Snowflake bounds of the message history export
+        self.message_since = message_since
+        self.message_until = message_until
+        self.retained_components = set()
+        self.sliced_components = set()
+        # Components stored with units that failed, their exporter runs again on resume
+        self.partial_components = set()
+        self.rate_limiter = RateLimiter()
+        self.retry_policy = RetryPolicy()
+        self.request_stats = RequestStats()
+        self.cache_file = cache_file
+        self.refresh_cache = refresh_cache
+        self.response_cache = ResponseCache(cache_file, refresh_cache) if cache_file else None
+        # Cassette that records every response, or serves them instead of the API when replaying
+        self.cassette = None
+        if replay_file:
+            self.cassette = RequestCassette(replay_file, replay=True, pace=replay_pace)
+        elif record_file:
+            self.cassette = RequestCassette(record_file)
+        # Outstanding GET requests by endpoint, awaited by every caller of the same GET
+        self.inflight_requests: Dict[str, List] = {}
+        self.coalesced_requests = 0
+        # Bounds the CPU-bound jobs handed to worker threads so pages can't pile up in memory
+        self.offload_slots = asyncio.Semaphore(OFFLOAD_QUEUE_SIZE)
+        self.concurrency = max(1, concurrency)
+        # Without a maximum the limit stays fixed at the given concurrency
+        self.max_concurrency = max(self.concurrency, max_concurrency or self.concurrency)
+        self.concurrency_controller = ConcurrencyController(self.concurrency, self.max_concurrency)
+        # Guild pipeline shared by all per-guild exporters of a run
+        self.pipeline_exporters = []
+        self.guild_pipeline = None
+        self.detailed_guilds_by_id = {}
+        # Previous export of an incremental run and the guilds that did not change since
+        self.previous_snapshot: Optional[ExportSnapshot] = None
+        self.previous_guilds: Dict[str, Tuple[Dict, Optional[Dict]]] = {}
+        self.previous_indicators: Dict[str, str] = {}
+        self.change_indicators: Dict[str, str] = {}
+        # Per-guild units whose request failed, by component, never reused by a later incremental run
+        self.failed_guild_units: Dict[str, List[str]] = {}
+        self.previous_failed_units: Dict[str, Set[str]] = {}
+        self.unchanged_guilds: Set[str] = set()
+        # Components of the exporters selected for this run, the only ones compared in a delta
+        self.selected_components: Optional[Set[str]] = None
         
         print(f"{Fore.LIGHTBLUE_EX}🤖 Discord Bot Exporter initialized{Style.RESET_ALL}")
 
     async def initialize_session(self):
-        """Initialize aiohttp session"""
-        self.session = aiohttp.ClientSession()
+        """Initialize aiohttp session with a tuned connection pool, or the shared pool of a batch"""
+        timeout = aiohttp.ClientTimeout(
+            total=self.request_timeout,
+            connect=CONNECT_TIMEOUT,
+            sock_read=self.request_timeout
+        )
+        if self.connector:
+            # The batch closes the shared pool once every bot is done
+            self.session = aiohttp.ClientSession(connector=self.connector, connector_owner=False, timeout=timeout)
+        else:
+            self.session = aiohttp.ClientSession(
+                connector=create_connector(self.pool_size, self.pool_size_per_host), timeout=timeout
+            )
         
     async def close_session(self):
         """Close aiohttp session"""
         if self.session:
             await self.session.close()
+        if self.response_cache:
+            self.response_cache.close()
+            self.response_cache = None
+        if self.cassette:
+            self.cassette.close()
+
+    def get_default_name(self) -> str:
+        """Name of an export without a given file name, after the bot and the current time"""
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"discord_bot_export_{self.bot_id if self.bot_id else 'unknown'}_{timestamp}"
+
+    def open_default_writer(self):
+        """Open the directory of an ndjson export given no directory, named like the JSON export file"""
+        if self.output_format == "ndjson" and self.writer is None:
+            self.writer = PartitionedExportWriter(self.get_default_name())
 
     def set_token(self, token: str):
         """Set bot token and prepare headers"""
@@ -123,12 +1711,15 @@ class DiscordExporter:
         
         # Try to extract bot ID from token
         try:
-            # Bot tokens are structured as: <bot_id>.<random_string>
-            parts = token.split('.')
-            if len(parts) >= 2:
-                self.bot_id = parts[0]
+            # Bot tokens are structured as: <base64 bot_id>.<random_string>
+            if len(token.split('.')) >= 2:
+                self.bot_id = token_bot_id(token)
         except Exception:
             pass
+        
+        if self.shared_ratelimit_dir is not None:
+            store = SharedRateLimitStore.for_token(token, self.shared_ratelimit_dir or None)
+            self.rate_limiter = SharedRateLimiter(store, self.rate_limiter.global_limit)
 
     def set_bot_id(self, bot_id: str):
         """Set bot ID"""
@@ -136,70 +1727,403 @@ class DiscordExporter:
         self.is_token_auth = False
         # No auth headers for bot ID lookup since we're using public APIs
 
-    async def make_request(self, endpoint: str, method: str = "GET", data: Optional[Dict] = None) -> Dict:
-        """Make a request to the Discord API with rate limit handling"""
+    async def make_request(self, endpoint: str, method: str = "GET", data: Optional[Dict] = None,
+                           strict: bool = False) -> Dict:
+        """Make a request to the Discord API, sharing one request between identical concurrent GETs
+
+        A failed request returns {}, or raises RequestFailed when strict is set so
+        callers can tell it apart from an empty result.
+        """
+        try:
+            if method != "GET":
+                return await self.send_request(endpoint, method, data)
+            
+            shared = self.inflight_requests.get(endpoint)
+            if shared is None:
+                pending = asyncio.ensure_future(self.send_request(endpoint))
+                # The request and how many other callers joined it
+                shared = self.inflight_requests[endpoint] = [pending, 0]
+                
+                def forget(future):
+                    # Runs before the first caller resumes, so nobody joins after it looked
+                    if self.inflight_requests.get(endpoint) is shared:
+                        del self.inflight_requests[endpoint]
+                    if not future.cancelled():
+                        # Retrieved here in case every caller was cancelled
+                        future.exception()
+                pending.add_done_callback(forget)
+                # A cancelled caller must not cancel the request for the others
+                response = await asyncio.shield(pending)
+                # Once the response is shared every caller, this one included, gets its own copy
+                return copy.deepcopy(response) if shared[1] else response
+            
+            shared[1] += 1
+            self.coalesced_requests += 1
+            return copy.deepcopy(await asyncio.shield(shared[0]))
+        except RequestFailed:
+            if strict:
+                raise
+            failed = FAILED_REQUESTS.get()
+            if failed is not None:
+                failed.append(endpoint)
+            return {}
+
+    async def send_request(self, endpoint: str, method: str = "GET", data: Optional[Dict] = None) -> Dict:
+        """Send a request to the Discord API with rate limit handling, raising RequestFailed if it fails"""
         if not self.session:
             await self.initialize_session()
+        if self.auth_failed:
+            raise RequestFailed(method, endpoint, 401)
             
         url = f"{API_ENDPOINT}{endpoint}"
-        
-        retry_attempts = 3
-        while retry_attempts > 0:
+        if method not in ("GET", "POST", "PUT", "DELETE"):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        
+        cache_identity = None
+        if self.response_cache:
+            identity = hashlib.sha256(self.token.encode('utf-8')).hexdigest() if self.token else f"id:{self.bot_id}"
+            route, _ = get_route_key("GET", endpoint)
+            if method != "GET":
+                # A change to a resource makes its cached copies and the cached listings above it stale
+                await self.response_cache.invalidate(identity, endpoint)
+            elif route in CACHE_TTLS:
+                cached = await self.response_cache.get(ResponseCache.get_key(identity, "GET", endpoint), CACHE_TTLS[route])
+                if cached is not None:
+                    return cached
+                cache_identity = identity
+        
+        replaying = self.cassette is not None and self.cassette.replaying
+        attempt = 0
+        rate_limit_retries = 0
+        status = None
+        while True:
+            bucket = None
             try:
-                if method == "GET":
-                    response = await self.session.get(url, headers=self.headers)
-                elif method == "POST":
-                    response = await self.session.post(url, headers=self.headers, json=data)
-                elif method == "PUT":
-                    response = await self.session.put(url, headers=self.headers, json=data)
-                elif method == "DELETE":
-                    response = await self.session.delete(url, headers=self.headers)
+                waited_from = time.monotonic()
+                # A full speed replay ignores the recorded rate limits
+                if not replaying or self.cassette.pace:
+                    bucket = await self.rate_limiter.acquire(method, endpoint)
+                self.request_stats.record_wait(method, endpoint, time.monotonic() - waited_from)
+                
+                await self.concurrency_controller.acquire()
+                status = None
+                body = b""
+                started = time.monotonic()
+                headers_at = None
+                try:
+                    if replaying:
+                        replayed = await self.cassette.replay(method, endpoint, data)
+                        if replayed is None:
+                            print(f"{Fore.YELLOW}No recorded response for {method} {endpoint}{Style.RESET_ALL}")
+                            raise RequestFailed(method, endpoint)
+                        status, headers, body = replayed
+                        headers_at = time.monotonic()
+                        self.rate_limiter.update(method, endpoint, headers, started)
+                    else:
+                        # The response is released back to the pool as soon as the block exits
+                        async with self.session.request(method, url, headers=self.headers, json=data) as response:
+                            headers_at = time.monotonic()
+                            status = response.status
+                            headers = response.headers
+                            self.rate_limiter.update(method, endpoint, headers, started)
+                            body = await response.read()
+                finally:
+                    latency = time.monotonic() - started
+                    # The body's size would skew the congestion signal, only the wait for the headers counts
+                    self.concurrency_controller.release(get_route_key(method, endpoint)[0],
+                                                        (headers_at or time.monotonic()) - started, status)
+                    self.request_stats.record(method, endpoint, status, len(body), latency)
+                if self.cassette and not replaying:
+                    self.cassette.record(method, endpoint, data, status, headers, body, started, latency)
+                
+                if status == 429:
+                    try:
+                        result = load_json(body)
+                    except ValueError:
+                        result = {}
                 else:
-                    raise ValueError(f"Unsupported HTTP method: {method}")
+                    result = load_json(body) if 200 <= status < 300 and status != 204 and body else {}
                 
                 # Handle rate limits
-                if response.status == 429:
-                    retry_after = int(response.headers.get('Retry-After', RATE_LIMIT_RETRY_DELAY))
-                    print(f"{Fore.YELLOW}Rate limited. Retrying in {retry_after} seconds...{Style.RESET_ALL}")
-                    await asyncio.sleep(retry_after)
+                if status == 429:
+                    retry_after, scope = self.retry_policy.rate_limit_delay(headers, result)
+                    if scope == 'global':
+                        self.rate_limiter.set_global_reset(retry_after)
+                    else:
+                        self.rate_limiter.set_bucket_reset(method, endpoint, retry_after)
+                    if not self.retry_policy.should_retry_rate_limit(rate_limit_retries):
+                        print(f"{Fore.RED}Still rate limited ({scope}) after {rate_limit_retries} retries, "
+                              f"giving up on {method} {endpoint}{Style.RESET_ALL}")
+                        raise RequestFailed(method, endpoint, status)
+                    rate_limit_retries += 1
+                    reason = "route_rate_limits" if scope == 'user' else f"{scope}_rate_limits"
+                    self.retry_policy.record(reason, retry_after)
+                    self.request_stats.record_retry(method, endpoint, rate_limited=True)
+                    print(f"{Fore.YELLOW}Rate limited ({scope}). Retrying in {retry_after:.2f} seconds...{Style.RESET_ALL}")
                     continue
                 
                 # Handle other status codes
-                if response.status == 401:
+                if status == 401:
                     print(f"{Fore.RED}Authentication failed. Please check your token.{Style.RESET_ALL}")
-                    sys.exit(1)
-                elif response.status == 403:
+                    if self.exit_on_auth_failure:
+                        sys.exit(1)
+                    self.auth_failed = True
+                    raise RequestFailed(method, endpoint, status)
+                elif status == 403:
                     print(f"{Fore.RED}Forbidden. The bot doesn't have permission to access this resource.{Style.RESET_ALL}")
-                    return {}
-                elif response.status == 404:
+                    raise RequestFailed(method, endpoint, status)
+                elif status == 404:
                     print(f"{Fore.YELLOW}Resource not found at {url}{Style.RESET_ALL}")
-                    return {}
-                elif 400 <= response.status < 500:
-                    print(f"{Fore.RED}Client error: {response.status} for {url}{Style.RESET_ALL}")
-                    return {}
-                elif 500 <= response.status < 600:
-                    print(f"{Fore.RED}Server error: {response.status} for {url}{Style.RESET_ALL}")
-                    retry_attempts -= 1
-                    await asyncio.sleep(RATE_LIMIT_RETRY_DELAY)
+                    raise RequestFailed(method, endpoint, status)
+                elif 400 <= status < 500:
+                    print(f"{Fore.RED}Client error: {status} for {url}{Style.RESET_ALL}")
+                    raise RequestFailed(method, endpoint, status)
+                elif 500 <= status < 600:
+                    print(f"{Fore.RED}Server error: {status} for {url}{Style.RESET_ALL}")
+                    if not await self.retry_after_error(method, endpoint, "server_errors", attempt):
+                        break
+                    attempt += 1
                     continue
                 
-                # Process successful response
-                if response.status == 204:  # No content
-                    return {}
-                
-                return await response.json()
+                # Process successful response (204 has no content)
+                if cache_identity:
+                    await self.response_cache.put(cache_identity, endpoint, result)
+                return result
                 
+            except RequestFailed:
+                raise
             except aiohttp.ClientError as e:
                 print(f"{Fore.RED}Request error: {str(e)}{Style.RESET_ALL}")
-                retry_attempts -= 1
-                await asyncio.sleep(RATE_LIMIT_RETRY_DELAY)
             except Exception as e:
                 print(f"{Fore.RED}Unexpected error: {str(e)}{Style.RESET_ALL}")
-                retry_attempts -= 1
-                await asyncio.sleep(RATE_LIMIT_RETRY_DELAY)
+            finally:
+                # Only once a 429 has been recorded, so waiting requests see its reset time
+                self.rate_limiter.release(bucket)
+            if not await self.retry_after_error(method, endpoint, "network_errors", attempt):
+                break
+            attempt += 1
         
         print(f"{Fore.RED}Failed to complete request after multiple attempts.{Style.RESET_ALL}")
-        return {}
+        raise RequestFailed(method, endpoint, status)
+
+    def replay_incomplete(self) -> bool:
+        """Whether a replay was asked for requests the cassette has no response to"""
+        return bool(self.cassette and self.cassette.replaying and self.cassette.stats["missing"])
+
+    async def offload(self, func, *args):
+        """Run blocking file work such as gzip compression and writes in a worker thread
+
+        zlib and file I/O release the GIL, so the event loop keeps serving the
+        requests in flight meanwhile; JSON encoding in the same job does not.
+        Callers wait while OFFLOAD_QUEUE_SIZE jobs are already queued or running.
+        A cancelled caller still waits for its job, a thread can't be stopped and
+        may be writing to a file the caller is about to close.
+        """
+        async with self.offload_slots:
+            future = asyncio.get_running_loop().run_in_executor(None, func, *args)
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                while not future.done():
+                    with contextlib.suppress(asyncio.CancelledError):
+                        await asyncio.wait([future])
+                # Retrieved so a failure of the abandoned job isn't reported as unhandled
+                future.exception()
+                raise
+
+    async def retry_after_error(self, method: str, endpoint: str, reason: str, attempt: int) -> bool:
+        """Back off before retrying a failed request, returning False when it must not be retried"""
+        if not self.retry_policy.should_retry(attempt):
+            return False
+        delay = self.retry_policy.backoff(attempt)
+        self.retry_policy.record(reason, delay)
+        self.request_stats.record_retry(method, endpoint)
+        if not (self.cassette and self.cassette.replaying and not self.cassette.pace):
+            await asyncio.sleep(delay)
+        return True
+
+    def store_component(self, key: str, value: Any, per_guild: bool = False, items: Optional[int] = None):
+        """Store an exported component, streaming it to disk when a writer is configured
+
+        Streamed components are only kept in memory when another exporter of the
+        run reads them.
+        """
+        if self.auth_failed:
+            # Requested with a rejected token, the component is empty rather than exported
+            return
+        if key in self.sliced_components:
+            # The guild pipeline already counted and streamed it guild by guild
+            if self.writer:
+                self.writer.close_component(key)
+                if key not in self.writer.manifest:
+                    self.writer.write_component(key, value)
+        else:
+            if per_guild:
+                stats = {"items": sum(count_items(guild_slice) for guild_slice in value.values()), "guilds": len(value)}
+            else:
+                stats = {"items": count_items(value)}
+            if items is not None:
+                stats["items"] = items
+            self.component_stats[key] = stats
+            if self.writer:
+                self.writer.write_component(key, value)
+            if self.journal:
+                self.journal.save_component(key, value)
+        
+        if self.writer is None or key in self.retained_components:
+            self.export_data[key] = value
+
+    def count_items(self, key: str) -> int:
+        """Number of records exported for a component"""
+        return self.component_stats.get(key, {}).get("items", 0)
+
+    def count_guilds(self, key: str) -> int:
+        """Number of guilds with data in a per-guild component"""
+        return self.component_stats.get(key, {}).get("guilds", 0)
+
+    def get_data_dir(self, name: str, create: bool = True) -> str:
+        """Return the directory for bulk data files such as member lists, creating it unless create is False"""
+        if self.data_dir:
+            base = self.data_dir
+        elif self.writer:
+            base = self.writer.directory
+        else:
+            base = f"discord_bot_export_{self.bot_id if self.bot_id else 'unknown'}_data"
+        directory = os.path.join(base, name)
+        if create:
+            os.makedirs(directory, exist_ok=True)
+        return directory
+
+    def get_application_id(self) -> Optional[str]:
+        """Return the application ID from the exported application info or the bot ID"""
+        application_id = self.export_data.get('application_info', {}).get('id')
+        if not application_id and self.bot_id:
+            application_id = self.bot_id
+        return application_id
+
+    def load_snapshot(self, path: str):
+        """Open a previous export file or directory to refetch only the guilds that changed since
+
+        Only the guild lists and the metadata are loaded up front, the per-guild
+        components are read guild by guild as unchanged guilds reuse them.
+        """
+        self.previous_snapshot = ExportSnapshot.open(path)
+        detailed_guilds = {guild.get('id'): guild for guild in self.previous_snapshot.load('detailed_guilds') or []}
+        self.previous_guilds = {
+            guild.get('id'): (guild, detailed_guilds.get(guild.get('id')))
+            for guild in self.previous_snapshot.load('guilds') or []
+        }
+        metadata = self.previous_snapshot.load('metadata') or {}
+        self.previous_indicators = metadata.get('change_indicators', {})
+        self.previous_failed_units = {
+            key: set(guild_ids) for key, guild_ids in metadata.get('failed_guild_units', {}).items()
+        }
+
+    async def reuse_guild_resource(self, guild_id: str, key: str) -> Optional[Any]:
+        """Serve a per-guild sub-resource of an unchanged guild from the previous snapshot
+
+        Returns None when the resource has to be requested.
+        """
+        if guild_id not in self.unchanged_guilds or key in VOLATILE_GUILD_COMPONENTS:
+            return None
+        if guild_id in self.previous_failed_units.get(key, ()):
+            # The snapshot only has an empty stand-in for it
+            return None
+        return await self.offload(self.previous_snapshot.load_guild_slice, key, guild_id)
+
+    def derive_guild_resource(self, guild_id: str, key: str) -> Optional[List[Dict]]:
+        """Serve a per-guild sub-resource from the already fetched guild payload
+
+        Returns None when the payload doesn't contain the resource and the
+        dedicated endpoint has to be requested instead.
+        """
+        field = DERIVED_GUILD_RESOURCES.get(key)
+        if not field:
+            return None
+        resource = self.detailed_guilds_by_id.get(guild_id, {}).get(field)
+        return resource if isinstance(resource, list) else None
+
+    async def run_guild_pipeline(self, exporters: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch the per-guild sub-resources of several exporters in a single pass over the guilds
+
+        Each worker takes one guild at a time and requests all of its sub-resources
+        concurrently; make_request bounds the total number of requests in flight.
+        """
+        application_id = self.get_application_id()
+        guild_ids = [guild.get('id') for guild in self.export_data.get('guilds', []) if guild.get('id')]
+        self.detailed_guilds_by_id = {guild.get('id'): guild for guild in self.export_data.get('detailed_guilds', [])}
+        guild_results = {guild_id: {} for guild_id in guild_ids}
+        
+        for exporter in exporters:
+            key = GUILD_RESOURCES[exporter][0]
+            self.component_stats[key] = {"items": 0, "guilds": 0}
+            self.sliced_components.add(key)
+        
+        queue = asyncio.Queue()
+        for guild_id in guild_ids:
+            queue.put_nowait(guild_id)
+        
+        async def fetch(guild_id, exporter):
+            key, endpoint = GUILD_RESOURCES[exporter]
+            if '{application_id}' in endpoint and not application_id:
+                return
+            if self.journal and self.journal.has_guild_slice(key, guild_id):
+                result = self.journal.load_guild_slice(key, guild_id)
+            else:
+                result = await self.reuse_guild_resource(guild_id, key)
+                if result is None:
+                    result = self.derive_guild_resource(guild_id, key)
+                if result is None:
+                    try:
+                        result = await self.make_request(
+                            endpoint.format(guild_id=guild_id, application_id=application_id), strict=True
+                        )
+                    except RequestFailed:
+                        # Not journaled, so a resumed export asks again
+                        self.partial_components.add(key)
+                        self.failed_guild_units.setdefault(key, []).append(guild_id)
+                        return
+                if self.journal:
+                    self.journal.save_guild_slice(key, guild_id, result)
+            if result:
+                guild_results[guild_id][key] = result
+        
+        async def worker():
+            while not queue.empty():
+                guild_id = queue.get_nowait()
+                await asyncio.gather(*(fetch(guild_id, exporter) for exporter in exporters))
+                
+                for key, result in guild_results[guild_id].items():
+                    stats = self.component_stats[key]
+                    stats["items"] += count_items(result)
+                    stats["guilds"] += 1
+                    if self.writer:
+                        self.writer.write_guild_slice(key, guild_id, result)
+                if self.writer:
+                    # The slices are on disk now, only keep what other exporters read
+                    guild_results[guild_id] = {
+                        key: result for key, result in guild_results[guild_id].items()
+                        if key in self.retained_components
+                    }
+        
+        await asyncio.gather(*(worker() for _ in range(min(self.max_concurrency, len(guild_ids)))))
+        
+        # Merge per-guild results into component dicts, keeping the guild order
+        results = {GUILD_RESOURCES[exporter][0]: {} for exporter in exporters}
+        for guild_id, resources in guild_results.items():
+            for key, result in resources.items():
+                results[key][guild_id] = result
+        return results
+
+    async def fetch_guild_resource(self, exporter: str) -> Dict[str, Any]:
+        """Return the per-guild results of an exporter, sharing one guild pipeline per run"""
+        if exporter not in self.pipeline_exporters:
+            results = await self.run_guild_pipeline([exporter])
+        else:
+            if self.guild_pipeline is None:
+                self.guild_pipeline = asyncio.ensure_future(self.run_guild_pipeline(self.pipeline_exporters))
+            results = await self.guild_pipeline
+        return results[GUILD_RESOURCES[exporter][0]]
 
     async def export_basic_info(self):
         """Export basic bot information"""
@@ -210,10 +2134,10 @@ class DiscordExporter:
             
         try:
             application_info = await self.make_request('/oauth2/applications/@me')
-            self.export_data['application_info'] = application_info
+            self.store_component('application_info', application_info)
             
             user_info = await self.make_request('/users/@me')
-            self.export_data['user_info'] = user_info
+            self.store_component('user_info', user_info)
             
             print(f"{Fore.GREEN}✓ Exported basic bot information{Style.RESET_ALL}")
         except Exception as e:
@@ -226,25 +2150,123 @@ class DiscordExporter:
             return
             
         try:
-            guilds = await self.make_request('/users/@me/guilds')
-            self.export_data['guilds'] = guilds
-            
-            # Get detailed information for each guild
-            detailed_guilds = []
-            for guild in guilds:
-                guild_id = guild.get('id')
-                if guild_id:
-                    detailed_guild = await self.make_request(f'/guilds/{guild_id}')
-                    if detailed_guild:
-                        detailed_guilds.append(detailed_guild)
-                        # Don't hit rate limits too hard
-                        await asyncio.sleep(0.5)
-            
-            self.export_data['detailed_guilds'] = detailed_guilds
+            guilds = []
+            details = {}
+            # Bounded, so paging through the guild list waits for the workers instead of queueing every guild
+            queue = asyncio.Queue(maxsize=self.max_concurrency)
+            
+            async def worker():
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        return
+                    index, guild = item
+                    details[index] = await self.fetch_guild_details(guild)
+            
+            workers = [asyncio.ensure_future(worker()) for _ in range(self.max_concurrency)]
+            try:
+                async for page in self.iter_guild_pages():
+                    # Fetch details for this page while the next page is requested
+                    for guild in page:
+                        if guild.get('id'):
+                            await queue.put((len(guilds), guild))
+                        guilds.append(guild)
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+            finally:
+                for task in workers:
+                    task.cancel()
+            
+            self.store_component('guilds', guilds)
+            
+            detailed_guilds = [details[index] for index in sorted(details) if details[index]]
+            
+            self.store_component('detailed_guilds', detailed_guilds)
             print(f"{Fore.GREEN}✓ Exported {len(guilds)} guilds with detailed information{Style.RESET_ALL}")
+            if self.previous_snapshot is not None:
+                print(f"{Fore.CYAN}{len(self.unchanged_guilds)} of {len(guilds)} guilds unchanged since the snapshot{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}Failed to export guilds: {str(e)}{Style.RESET_ALL}")
 
+    async def iter_guild_pages(self):
+        """Yield the guild list page by page, or the guilds assigned to this shard as one page"""
+        if self.shard_guilds is not None:
+            yield self.shard_guilds
+            return
+        
+        after = None
+        while True:
+            endpoint = f'/users/@me/guilds?limit={GUILDS_PAGE_SIZE}&with_counts=true'
+            if after:
+                endpoint += f'&after={after}'
+            try:
+                page = await self.make_request(endpoint, strict=True)
+            except RequestFailed as e:
+                # Not the end of the list, the guilds after this page are missing
+                print(f"{Fore.YELLOW}Guild list is incomplete: {str(e)}{Style.RESET_ALL}")
+                self.partial_components.add('guilds')
+                break
+            if not page:
+                break
+            yield page
+            if len(page) < GUILDS_PAGE_SIZE:
+                break
+            after = page[-1].get('id')
+
+    async def fetch_guild_details(self, guild: Dict) -> Dict:
+        """Fetch the full payload of a guild, reusing the snapshot's when the guild did not change
+
+        In an incremental run the newest audit log entry is the change indicator: a
+        guild is unchanged when it matches the snapshot and so does its list entry.
+        The snapshot's indicator comes from its metadata, or from its exported audit
+        logs when it was a full export. Guilds whose audit log the bot can't read
+        are remembered and fetched in full without asking.
+        The member and presence counts of a reused payload are taken from the list
+        entry, they change without an audit log entry.
+        """
+        guild_id = guild['id']
+        previous_guild, previous_details = self.previous_guilds.get(guild_id, (None, None))
+        if self.previous_snapshot is not None and guild_id in self.previous_indicators \
+                and self.previous_indicators[guild_id] is None:
+            # The bot can't read this guild's audit log, don't ask again every run
+            self.change_indicators[guild_id] = None
+        elif previous_details and previous_guild is not None \
+                and strip_volatile_fields(previous_guild) == strip_volatile_fields(guild):
+            if guild_id in self.previous_indicators:
+                previous_indicator = self.previous_indicators[guild_id]
+            else:
+                previous_indicator = await self.snapshot_change_indicator(guild_id)
+            # Without a previous indicator the guild can't be reused, it is only worth
+            # asking for one when this run doesn't export the audit logs to read it from
+            if previous_indicator is not None or 'guild_audit_logs' not in (self.selected_components or ()):
+                try:
+                    audit_log = await self.make_request(f'/guilds/{guild_id}/audit-logs?limit=1', strict=True)
+                except RequestFailed as e:
+                    if e.status == 403:
+                        self.change_indicators[guild_id] = None
+                    audit_log = None
+                if isinstance(audit_log, dict) and 'audit_log_entries' in audit_log:
+                    indicator = latest_audit_log_entry(audit_log)
+                    self.change_indicators[guild_id] = indicator
+                    if previous_indicator == indicator:
+                        self.unchanged_guilds.add(guild_id)
+                        counts = {field: guild[field] for field in VOLATILE_GUILD_FIELDS if field in guild}
+                        return dict(previous_details, **counts)
+        try:
+            return await self.make_request(f'/guilds/{guild_id}?with_counts=true', strict=True)
+        except RequestFailed:
+            # Only the details are incomplete, the guild itself is still listed
+            self.partial_components.add('detailed_guilds')
+            return {}
+
+    async def snapshot_change_indicator(self, guild_id: str) -> Optional[str]:
+        """Read a guild's change indicator from the audit logs of the snapshot, None if it has none"""
+        audit_log = await self.offload(self.previous_snapshot.load_guild_slice, 'guild_audit_logs', guild_id)
+        if isinstance(audit_log, dict) and 'audit_log_entries' in audit_log:
+            return latest_audit_log_entry(audit_log)
+        return None
+
     async def export_commands(self):
         """Export all application commands"""
         if not self.is_token_auth:
@@ -260,23 +2282,16 @@ class DiscordExporter:
                 print(f"{Fore.YELLOW}Cannot export commands without application ID.{Style.RESET_ALL}")
                 return
                 
-            global_commands = await self.make_request(f'/applications/{application_id}/commands')
-            self.export_data['global_commands'] = global_commands
+            global_commands = []
+            if not self.guilds_only_shard:
+                global_commands = await self.make_request(f'/applications/{application_id}/commands')
+                self.store_component('global_commands', global_commands)
             
             # Get guild-specific commands for each guild
-            guild_commands = {}
-            guilds = self.export_data.get('guilds', [])
-            for guild in guilds:
-                guild_id = guild.get('id')
-                if guild_id:
-                    commands = await self.make_request(f'/applications/{application_id}/guilds/{guild_id}/commands')
-                    if commands:
-                        guild_commands[guild_id] = commands
-                    # Don't hit rate limits too hard
-                    await asyncio.sleep(0.5)
-            
-            self.export_data['guild_commands'] = guild_commands
-            print(f"{Fore.GREEN}✓ Exported {len(global_commands)} global commands and guild-specific commands for {len(guild_commands)} guilds{Style.RESET_ALL}")
+            guild_commands = await self.fetch_guild_resource('export_commands')
+            
+            self.store_component('guild_commands', guild_commands)
+            print(f"{Fore.GREEN}✓ Exported {len(global_commands)} global commands and guild-specific commands for {self.count_guilds('guild_commands')} guilds{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}Failed to export commands: {str(e)}{Style.RESET_ALL}")
 
@@ -296,21 +2311,10 @@ class DiscordExporter:
                 return
             
             # Get guild-specific permissions for each guild
-            guild_permissions = {}
-            guilds = self.export_data.get('guilds', [])
-            for guild in guilds:
-                guild_id = guild.get('id')
-                if guild_id:
-                    permissions = await self.make_request(
-                        f'/applications/{application_id}/guilds/{guild_id}/commands/permissions'
-                    )
-                    if permissions:
-                        guild_permissions[guild_id] = permissions
-                    # Don't hit rate limits too hard
-                    await asyncio.sleep(0.5)
+            guild_permissions = await self.fetch_guild_resource('export_permissions')
             
-            self.export_data['guild_permissions'] = guild_permissions
-            print(f"{Fore.GREEN}✓ Exported permissions for {len(guild_permissions)} guilds{Style.RESET_ALL}")
+            self.store_component('guild_permissions', guild_permissions)
+            print(f"{Fore.GREEN}✓ Exported permissions for {self.count_guilds('guild_permissions')} guilds{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}Failed to export permissions: {str(e)}{Style.RESET_ALL}")
 
@@ -321,21 +2325,12 @@ class DiscordExporter:
             return
             
         try:
-            guild_channels = {}
-            guilds = self.export_data.get('guilds', [])
-            for guild in guilds:
-                guild_id = guild.get('id')
-                if guild_id:
-                    channels = await self.make_request(f'/guilds/{guild_id}/channels')
-                    if channels:
-                        guild_channels[guild_id] = channels
-                    # Don't hit rate limits too hard
-                    await asyncio.sleep(0.5)
+            guild_channels = await self.fetch_guild_resource('export_channels')
             
-            self.export_data['guild_channels'] = guild_channels
+            self.store_component('guild_channels', guild_channels)
             
-            channel_count = sum(len(channels) for channels in guild_channels.values())
-            print(f"{Fore.GREEN}✓ Exported {channel_count} channels from {len(guild_channels)} guilds{Style.RESET_ALL}")
+            channel_count = self.count_items('guild_channels')
+            print(f"{Fore.GREEN}✓ Exported {channel_count} channels from {self.count_guilds('guild_channels')} guilds{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}Failed to export channels: {str(e)}{Style.RESET_ALL}")
 
@@ -346,32 +2341,24 @@ class DiscordExporter:
             return
             
         try:
-            application_id = self.export_data.get('application_info', {}).get('id')
+            application_id = self.get_application_id()
             if not application_id:
                 print(f"{Fore.YELLOW}Cannot export webhooks without application ID.{Style.RESET_ALL}")
                 return
-                
-            webhooks = await self.make_request(f'/applications/{application_id}/webhooks')
-            self.export_data['webhooks'] = webhooks
             
-            print(f"{Fore.GREEN}✓ Exported {len(webhooks)} application webhooks{Style.RESET_ALL}")
+            if not self.guilds_only_shard:
+                webhooks = await self.make_request(f'/applications/{application_id}/webhooks')
+                self.store_component('webhooks', webhooks)
+                
+                print(f"{Fore.GREEN}✓ Exported {len(webhooks)} application webhooks{Style.RESET_ALL}")
             
             # Also export guild webhooks
-            guild_webhooks = {}
-            guilds = self.export_data.get('guilds', [])
-            for guild in guilds:
-                guild_id = guild.get('id')
-                if guild_id:
-                    webhooks = await self.make_request(f'/guilds/{guild_id}/webhooks')
-                    if webhooks:
-                        guild_webhooks[guild_id] = webhooks
-                    # Don't hit rate limits too hard
-                    await asyncio.sleep(0.5)
+            guild_webhooks = await self.fetch_guild_resource('export_webhooks')
             
-            self.export_data['guild_webhooks'] = guild_webhooks
+            self.store_component('guild_webhooks', guild_webhooks)
             
-            webhook_count = sum(len(webhooks) for webhooks in guild_webhooks.values())
-            print(f"{Fore.GREEN}✓ Exported {webhook_count} webhooks from {len(guild_webhooks)} guilds{Style.RESET_ALL}")
+            webhook_count = self.count_items('guild_webhooks')
+            print(f"{Fore.GREEN}✓ Exported {webhook_count} webhooks from {self.count_guilds('guild_webhooks')} guilds{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}Failed to export webhooks: {str(e)}{Style.RESET_ALL}")
 
@@ -384,9 +2371,9 @@ class DiscordExporter:
         try:
             # There's no direct API to get all interactions, so we export summary stats
             # This is a placeholder for what could be a webhook-based collector
-            self.export_data['interactions'] = {
+            self.store_component('interactions', {
                 "note": "Discord API doesn't provide historical interaction data. Set up a webhook to log interactions."
-            }
+            })
             
             print(f"{Fore.YELLOW}Limited interaction data available through API.{Style.RESET_ALL}")
         except Exception as e:
@@ -402,10 +2389,10 @@ class DiscordExporter:
             # Discord API doesn't have a direct endpoint to get current presence settings
             # Extract from gateway connection if possible
             user_info = self.export_data.get('user_info', {})
-            self.export_data['presence'] = {
+            self.store_component('presence', {
                 "status": "Presence details cannot be directly exported from API",
                 "bot_user": user_info
-            }
+            })
             
             print(f"{Fore.YELLOW}Limited presence data available through API.{Style.RESET_ALL}")
         except Exception as e:
@@ -418,8 +2405,9 @@ class DiscordExporter:
             return
             
         try:
-            voice_regions = await self.make_request('/voice/regions')
-            self.export_data['voice_regions'] = voice_regions
+            if not self.guilds_only_shard:
+                voice_regions = await self.make_request('/voice/regions')
+                self.store_component('voice_regions', voice_regions)
             
             # Get voice states from guilds
             guild_voice_states = {}
@@ -430,7 +2418,7 @@ class DiscordExporter:
                 if guild_id and voice_states:
                     guild_voice_states[guild_id] = voice_states
             
-            self.export_data['guild_voice_states'] = guild_voice_states
+            self.store_component('guild_voice_states', guild_voice_states, per_guild=True)
             
             print(f"{Fore.GREEN}✓ Exported voice regions and current voice states{Style.RESET_ALL}")
         except Exception as e:
@@ -443,21 +2431,12 @@ class DiscordExporter:
             return
             
         try:
-            guild_emojis = {}
-            guilds = self.export_data.get('guilds', [])
-            for guild in guilds:
-                guild_id = guild.get('id')
-                if guild_id:
-                    emojis = await self.make_request(f'/guilds/{guild_id}/emojis')
-                    if emojis:
-                        guild_emojis[guild_id] = emojis
-                    # Don't hit rate limits too hard
-                    await asyncio.sleep(0.5)
+            guild_emojis = await self.fetch_guild_resource('export_emoji')
             
-            self.export_data['guild_emojis'] = guild_emojis
+            self.store_component('guild_emojis', guild_emojis)
             
-            emoji_count = sum(len(emojis) for emojis in guild_emojis.values())
-            print(f"{Fore.GREEN}✓ Exported {emoji_count} custom emoji from {len(guild_emojis)} guilds{Style.RESET_ALL}")
+            emoji_count = self.count_items('guild_emojis')
+            print(f"{Fore.GREEN}✓ Exported {emoji_count} custom emoji from {self.count_guilds('guild_emojis')} guilds{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}Failed to export emoji: {str(e)}{Style.RESET_ALL}")
 
@@ -468,21 +2447,12 @@ class DiscordExporter:
             return
             
         try:
-            guild_stickers = {}
-            guilds = self.export_data.get('guilds', [])
-            for guild in guilds:
-                guild_id = guild.get('id')
-                if guild_id:
-                    stickers = await self.make_request(f'/guilds/{guild_id}/stickers')
-                    if stickers:
-                        guild_stickers[guild_id] = stickers
-                    # Don't hit rate limits too hard
-                    await asyncio.sleep(0.5)
+            guild_stickers = await self.fetch_guild_resource('export_stickers')
             
-            self.export_data['guild_stickers'] = guild_stickers
+            self.store_component('guild_stickers', guild_stickers)
             
-            sticker_count = sum(len(stickers) for stickers in guild_stickers.values())
-            print(f"{Fore.GREEN}✓ Exported {sticker_count} custom stickers from {len(guild_stickers)} guilds{Style.RESET_ALL}")
+            sticker_count = self.count_items('guild_stickers')
+            print(f"{Fore.GREEN}✓ Exported {sticker_count} custom stickers from {self.count_guilds('guild_stickers')} guilds{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}Failed to export stickers: {str(e)}{Style.RESET_ALL}")
 
@@ -493,21 +2463,12 @@ class DiscordExporter:
             return
             
         try:
-            guild_events = {}
-            guilds = self.export_data.get('guilds', [])
-            for guild in guilds:
-                guild_id = guild.get('id')
-                if guild_id:
-                    events = await self.make_request(f'/guilds/{guild_id}/scheduled-events')
-                    if events:
-                        guild_events[guild_id] = events
-                    # Don't hit rate limits too hard
-                    await asyncio.sleep(0.5)
+            guild_events = await self.fetch_guild_resource('export_scheduled_events')
             
-            self.export_data['guild_events'] = guild_events
+            self.store_component('guild_events', guild_events)
             
-            event_count = sum(len(events) for events in guild_events.values())
-            print(f"{Fore.GREEN}✓ Exported {event_count} scheduled events from {len(guild_events)} guilds{Style.RESET_ALL}")
+            event_count = self.count_items('guild_events')
+            print(f"{Fore.GREEN}✓ Exported {event_count} scheduled events from {self.count_guilds('guild_events')} guilds{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}Failed to export scheduled events: {str(e)}{Style.RESET_ALL}")
 
@@ -526,10 +2487,10 @@ class DiscordExporter:
                 if guild_id and roles:
                     guild_roles[guild_id] = roles
             
-            self.export_data['guild_roles'] = guild_roles
+            self.store_component('guild_roles', guild_roles, per_guild=True)
             
-            role_count = sum(len(roles) for roles in guild_roles.values())
-            print(f"{Fore.GREEN}✓ Exported {role_count} roles from {len(guild_roles)} guilds{Style.RESET_ALL}")
+            role_count = self.count_items('guild_roles')
+            print(f"{Fore.GREEN}✓ Exported {role_count} roles from {self.count_guilds('guild_roles')} guilds{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}Failed to export roles: {str(e)}{Style.RESET_ALL}")
 
@@ -540,21 +2501,12 @@ class DiscordExporter:
             return
             
         try:
-            guild_invites = {}
-            guilds = self.export_data.get('guilds', [])
-            for guild in guilds:
-                guild_id = guild.get('id')
-                if guild_id:
-                    invites = await self.make_request(f'/guilds/{guild_id}/invites')
-                    if invites:
-                        guild_invites[guild_id] = invites
-                    # Don't hit rate limits too hard
-                    await asyncio.sleep(0.5)
+            guild_invites = await self.fetch_guild_resource('export_invites')
             
-            self.export_data['guild_invites'] = guild_invites
+            self.store_component('guild_invites', guild_invites)
             
-            invite_count = sum(len(invites) for invites in guild_invites.values())
-            print(f"{Fore.GREEN}✓ Exported {invite_count} active invites from {len(guild_invites)} guilds{Style.RESET_ALL}")
+            invite_count = self.count_items('guild_invites')
+            print(f"{Fore.GREEN}✓ Exported {invite_count} active invites from {self.count_guilds('guild_invites')} guilds{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}Failed to export invites: {str(e)}{Style.RESET_ALL}")
 
@@ -565,21 +2517,12 @@ class DiscordExporter:
             return
             
         try:
-            guild_bans = {}
-            guilds = self.export_data.get('guilds', [])
-            for guild in guilds:
-                guild_id = guild.get('id')
-                if guild_id:
-                    bans = await self.make_request(f'/guilds/{guild_id}/bans')
-                    if bans:
-                        guild_bans[guild_id] = bans
-                    # Don't hit rate limits too hard
-                    await asyncio.sleep(0.5)
+            guild_bans = await self.fetch_guild_resource('export_bans')
             
-            self.export_data['guild_bans'] = guild_bans
+            self.store_component('guild_bans', guild_bans)
             
-            ban_count = sum(len(bans) for bans in guild_bans.values())
-            print(f"{Fore.GREEN}✓ Exported {ban_count} bans from {len(guild_bans)} guilds{Style.RESET_ALL}")
+            ban_count = self.count_items('guild_bans')
+            print(f"{Fore.GREEN}✓ Exported {ban_count} bans from {self.count_guilds('guild_bans')} guilds{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}Failed to export bans: {str(e)}{Style.RESET_ALL}")
 
@@ -590,21 +2533,12 @@ class DiscordExporter:
             return
             
         try:
-            guild_audit_logs = {}
-            guilds = self.export_data.get('guilds', [])
-            for guild in guilds:
-                guild_id = guild.get('id')
-                if guild_id:
-                    audit_logs = await self.make_request(f'/guilds/{guild_id}/audit-logs?limit=100')
-                    if audit_logs:
-                        guild_audit_logs[guild_id] = audit_logs
-                    # Don't hit rate limits too hard
-                    await asyncio.sleep(0.5)
+            guild_audit_logs = await self.fetch_guild_resource('export_audit_logs')
             
-            self.export_data['guild_audit_logs'] = guild_audit_logs
+            self.store_component('guild_audit_logs', guild_audit_logs)
             
-            log_count = sum(len(logs.get('audit_log_entries', [])) for logs in guild_audit_logs.values())
-            print(f"{Fore.GREEN}✓ Exported {log_count} audit log entries from {len(guild_audit_logs)} guilds{Style.RESET_ALL}")
+            log_count = self.count_items('guild_audit_logs')
+            print(f"{Fore.GREEN}✓ Exported {log_count} audit log entries from {self.count_guilds('guild_audit_logs')} guilds{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}Failed to export audit logs: {str(e)}{Style.RESET_ALL}")
 
@@ -615,19 +2549,10 @@ class DiscordExporter:
             return
             
         try:
-            guild_widgets = {}
-            guilds = self.export_data.get('guilds', [])
-            for guild in guilds:
-                guild_id = guild.get('id')
-                if guild_id:
-                    widget = await self.make_request(f'/guilds/{guild_id}/widget')
-                    if widget:
-                        guild_widgets[guild_id] = widget
-                    # Don't hit rate limits too hard
-                    await asyncio.sleep(0.5)
-            
-            self.export_data['guild_widgets'] = guild_widgets
-            print(f"{Fore.GREEN}✓ Exported widget settings from {len(guild_widgets)} guilds{Style.RESET_ALL}")
+            guild_widgets = await self.fetch_guild_resource('export_widget_settings')
+            
+            self.store_component('guild_widgets', guild_widgets)
+            print(f"{Fore.GREEN}✓ Exported widget settings from {self.count_guilds('guild_widgets')} guilds{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}Failed to export widget settings: {str(e)}{Style.RESET_ALL}")
 
@@ -638,21 +2563,12 @@ class DiscordExporter:
             return
             
         try:
-            guild_integrations = {}
-            guilds = self.export_data.get('guilds', [])
-            for guild in guilds:
-                guild_id = guild.get('id')
-                if guild_id:
-                    integrations = await self.make_request(f'/guilds/{guild_id}/integrations')
-                    if integrations:
-                        guild_integrations[guild_id] = integrations
-                    # Don't hit rate limits too hard
-                    await asyncio.sleep(0.5)
+            guild_integrations = await self.fetch_guild_resource('export_integrations')
             
-            self.export_data['guild_integrations'] = guild_integrations
+            self.store_component('guild_integrations', guild_integrations)
             
-            integration_count = sum(len(integrations) for integrations in guild_integrations.values())
-            print(f"{Fore.GREEN}✓ Exported {integration_count} integrations from {len(guild_integrations)} guilds{Style.RESET_ALL}")
+            integration_count = self.count_items('guild_integrations')
+            print(f"{Fore.GREEN}✓ Exported {integration_count} integrations from {self.count_guilds('guild_integrations')} guilds{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}Failed to export integrations: {str(e)}{Style.RESET_ALL}")
 
@@ -663,21 +2579,12 @@ class DiscordExporter:
             return
             
         try:
-            guild_templates = {}
-            guilds = self.export_data.get('guilds', [])
-            for guild in guilds:
-                guild_id = guild.get('id')
-                if guild_id:
-                    templates = await self.make_request(f'/guilds/{guild_id}/templates')
-                    if templates:
-                        guild_templates[guild_id] = templates
-                    # Don't hit rate limits too hard
-                    await asyncio.sleep(0.5)
+            guild_templates = await self.fetch_guild_resource('export_templates')
             
-            self.export_data['guild_templates'] = guild_templates
+            self.store_component('guild_templates', guild_templates)
             
-            template_count = sum(len(templates) for templates in guild_templates.values())
-            print(f"{Fore.GREEN}✓ Exported {template_count} templates from {len(guild_templates)} guilds{Style.RESET_ALL}")
+            template_count = self.count_items('guild_templates')
+            print(f"{Fore.GREEN}✓ Exported {template_count} templates from {self.count_guilds('guild_templates')} guilds{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}Failed to export templates: {str(e)}{Style.RESET_ALL}")
 
@@ -688,19 +2595,10 @@ class DiscordExporter:
             return
             
         try:
-            guild_welcome_screens = {}
-            guilds = self.export_data.get('guilds', [])
-            for guild in guilds:
-                guild_id = guild.get('id')
-                if guild_id:
-                    welcome_screen = await self.make_request(f'/guilds/{guild_id}/welcome-screen')
-                    if welcome_screen:
-                        guild_welcome_screens[guild_id] = welcome_screen
-                    # Don't hit rate limits too hard
-                    await asyncio.sleep(0.5)
-            
-            self.export_data['guild_welcome_screens'] = guild_welcome_screens
-            print(f"{Fore.GREEN}✓ Exported welcome screens from {len(guild_welcome_screens)} guilds{Style.RESET_ALL}")
+            guild_welcome_screens = await self.fetch_guild_resource('export_welcome_screens')
+            
+            self.store_component('guild_welcome_screens', guild_welcome_screens)
+            print(f"{Fore.GREEN}✓ Exported welcome screens from {self.count_guilds('guild_welcome_screens')} guilds{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}Failed to export welcome screens: {str(e)}{Style.RESET_ALL}")
 
@@ -711,21 +2609,12 @@ class DiscordExporter:
             return
             
         try:
-            guild_auto_mod_rules = {}
-            guilds = self.export_data.get('guilds', [])
-            for guild in guilds:
-                guild_id = guild.get('id')
-                if guild_id:
-                    rules = await self.make_request(f'/guilds/{guild_id}/auto-moderation/rules')
-                    if rules:
-                        guild_auto_mod_rules[guild_id] = rules
-                    # Don't hit rate limits too hard
-                    await asyncio.sleep(0.5)
+            guild_auto_mod_rules = await self.fetch_guild_resource('export_auto_moderation')
             
-            self.export_data['guild_auto_mod_rules'] = guild_auto_mod_rules
+            self.store_component('guild_auto_mod_rules', guild_auto_mod_rules)
             
-            rule_count = sum(len(rules) for rules in guild_auto_mod_rules.values())
-            print(f"{Fore.GREEN}✓ Exported {rule_count} auto-moderation rules from {len(guild_auto_mod_rules)} guilds{Style.RESET_ALL}")
+            rule_count = self.count_items('guild_auto_mod_rules')
+            print(f"{Fore.GREEN}✓ Exported {rule_count} auto-moderation rules from {self.count_guilds('guild_auto_mod_rules')} guilds{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}Failed to export auto-moderation rules: {str(e)}{Style.RESET_ALL}")
 
@@ -737,7 +2626,7 @@ class DiscordExporter:
             
         try:
             stage_instances = await self.make_request('/stage-instances')
-            self.export_data['stage_instances'] = stage_instances
+            self.store_component('stage_instances', stage_instances)
             
             print(f"{Fore.GREEN}✓ Exported {len(stage_instances)} active stage instances{Style.RESET_ALL}")
         except Exception as e:
@@ -759,7 +2648,7 @@ class DiscordExporter:
                 return
                 
             role_connections = await self.make_request(f'/applications/{application_id}/role-connections/metadata')
-            self.export_data['role_connections_metadata'] = role_connections
+            self.store_component('role_connections_metadata', role_connections)
             
             print(f"{Fore.GREEN}✓ Exported role connection metadata{Style.RESET_ALL}")
         except Exception as e:
@@ -781,7 +2670,7 @@ class DiscordExporter:
                 return
                 
             entitlements = await self.make_request(f'/applications/{application_id}/entitlements')
-            self.export_data['entitlements'] = entitlements
+            self.store_component('entitlements', entitlements)
             
             print(f"{Fore.GREEN}✓ Exported {len(entitlements)} entitlements{Style.RESET_ALL}")
         except Exception as e:
@@ -803,7 +2692,7 @@ class DiscordExporter:
                 return
                 
             skus = await self.make_request(f'/applications/{application_id}/skus')
-            self.export_data['skus'] = skus
+            self.store_component('skus', skus)
             
             print(f"{Fore.GREEN}✓ Exported {len(skus)} SKUs{Style.RESET_ALL}")
         except Exception as e:
@@ -833,11 +2722,11 @@ class DiscordExporter:
             scope_string = "%20".join(default_scopes)
             auth_url = f"https://discord.com/api/oauth2/authorize?client_id={application_id}&permissions={default_permissions}&scope={scope_string}"
             
-            self.export_data['auth_url'] = {
+            self.store_component('auth_url', {
                 "url": auth_url,
                 "scopes": default_scopes,
                 "permissions": default_permissions
-            }
+            })
             
             print(f"{Fore.GREEN}✓ Generated authorization URL{Style.RESET_ALL}")
         except Exception as e:
@@ -851,42 +2740,121 @@ class DiscordExporter:
             
         try:
             member_counts = {}
-            total_members = 0
+            exported_members = {}
+            incomplete_guilds = []
             unique_members = set()
+            # Created by the first guild whose members are written
+            directory = self.get_data_dir('members', create=False)
             
-            detailed_guilds = self.export_data.get('detailed_guilds', [])
-            for guild in detailed_guilds:
+            queue = asyncio.Queue()
+            for guild in self.export_data.get('detailed_guilds', []):
                 guild_id = guild.get('id')
-                member_count = guild.get('approximate_member_count', guild.get('member_count', 0))
-                
                 if guild_id:
-                    member_counts[guild_id] = member_count
-                    total_members += member_count
-                    
-                    # Try to get guild members to count unique members
+                    member_counts[guild_id] = guild.get('approximate_member_count', guild.get('member_count', 0))
+                    queue.put_nowait(guild_id)
+            
+            async def worker():
+                while not queue.empty():
+                    guild_id = queue.get_nowait()
                     try:
-                        members = await self.make_request(f'/guilds/{guild_id}/members?limit=1000')
-                        for member in members:
-                            user_id = member.get('user', {}).get('id')
-                            if user_id:
-                                unique_members.add(user_id)
-                    except:
-                        # Fetching members might fail due to permissions, continue anyway
-                        pass
-                    
-                    # Don't hit rate limits too hard
-                    await asyncio.sleep(0.5)
-            
-            self.export_data['member_counts'] = {
+                        exported, complete = await self.export_guild_members(guild_id, directory, unique_members)
+                    except Exception as e:
+                        print(f"{Fore.YELLOW}Could not export members of guild {guild_id}: {str(e)}{Style.RESET_ALL}")
+                        exported, complete = 0, False
+                    if exported:
+                        exported_members[guild_id] = exported
+                    if not complete:
+                        # Fetching members might fail due to permissions, keep the approximate count
+                        incomplete_guilds.append(guild_id)
+                    elif exported:
+                        # The full member list is exact, unlike the approximate count
+                        member_counts[guild_id] = exported
+            
+            await asyncio.gather(*(worker() for _ in range(min(self.max_concurrency, queue.qsize()))))
+            
+            total_members = sum(member_counts.values())
+            self.store_component('member_counts', {
                 "guild_counts": member_counts,
                 "total_members": total_members,
-                "unique_members_found": len(unique_members)
-            }
-            
-            print(f"{Fore.GREEN}✓ Exported member counts across {len(member_counts)} guilds{Style.RESET_ALL}")
+                "unique_members_found": len(unique_members),
+                "exported_members": {guild_id: exported_members[guild_id] for guild_id in member_counts if guild_id in exported_members},
+                "total_exported_members": sum(exported_members.values()),
+                "incomplete_guilds": [guild_id for guild_id in member_counts if guild_id in incomplete_guilds],
+                "member_files": directory
+            }, items=total_members)
+            if incomplete_guilds:
+                self.partial_components.add('member_counts')
+            
+            print(f"{Fore.GREEN}✓ Exported member counts across {len(member_counts)} guilds "
+                  f"and {sum(exported_members.values())} members to {directory}{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}Failed to export member counts: {str(e)}{Style.RESET_ALL}")
 
+    async def export_guild_members(self, guild_id: str, directory: str, unique_members: Set[int]) -> Tuple[int, bool]:
+        """Page through every member of a guild and stream them to <guild_id>.ndjson
+
+        Returns the number of members written and whether the list is complete, it
+        is not when a page could not be fetched. Only the user IDs are kept in
+        memory. With a journal, every fetched page is checkpointed and an
+        interrupted guild continues after the last recorded member.
+        """
+        path = os.path.join(directory, f"{guild_id}.ndjson")
+        unit = f"members/{guild_id}"
+        checkpoint = self.journal.get_cursor(unit) if self.journal else None
+        exported = 0
+        after = 0
+        mode = 'wb'
+        # Without its file the checkpoint is of no use, start the guild over
+        if checkpoint and os.path.exists(path):
+            exported, after = checkpoint["count"], checkpoint["cursor"]
+            # Drop anything written after the last checkpoint, then recollect the known user IDs
+            with open(path, 'r+b') as f:
+                f.truncate(checkpoint["offset"])
+                f.seek(0)
+                for line in f:
+                    user_id = load_json(line).get('user', {}).get('id')
+                    if user_id:
+                        unique_members.add(int(user_id))
+            if checkpoint["done"]:
+                return exported, True
+            mode = 'ab'
+        
+        complete = True
+        os.makedirs(directory, exist_ok=True)
+        with open(path, mode) as f:
+            while True:
+                try:
+                    members = await self.make_request(
+                        f'/guilds/{guild_id}/members?limit={MEMBERS_PAGE_SIZE}&after={after}', strict=True
+                    )
+                except RequestFailed as e:
+                    print(f"{Fore.YELLOW}Member list of guild {guild_id} is incomplete: {str(e)}{Style.RESET_ALL}")
+                    complete = False
+                    break
+                if not members:
+                    if self.journal:
+                        self.journal.save_cursor(unit, after, exported, f.tell(), done=True)
+                    break
+                
+                exported += await self.offload(write_ndjson, f, members)
+                for member in members:
+                    user_id = member.get('user', {}).get('id')
+                    if user_id:
+                        unique_members.add(int(user_id))
+                
+                # Members are returned in ascending user ID order
+                after = members[-1].get('user', {}).get('id')
+                done = len(members) < MEMBERS_PAGE_SIZE or not after
+                if self.journal:
+                    f.flush()
+                    self.journal.save_cursor(unit, after, exported, f.tell(), done=done)
+                if done:
+                    break
+        
+        if not exported:
+            os.remove(path)
+        return exported, complete
+
     async def export_message_stats(self):
         """Export message statistics (approximate)"""
         if not self.is_token_auth:
@@ -917,9 +2885,6 @@ class DiscordExporter:
                             channel_messages[channel_id] = len(messages)
                             total_messages += len(messages)
                             channels_sampled += 1
-                        
-                        # Don't hit rate limits too hard
-                        await asyncio.sleep(0.5)
                 
                 # Limit samples to prevent excessive API calls
                 if channels_sampled >= 10:
@@ -929,12 +2894,180 @@ class DiscordExporter:
             message_stats["channels_sampled"] = channels_sampled
             message_stats["total_messages_sampled"] = total_messages
             
-            self.export_data['message_stats'] = message_stats
+            self.store_component('message_stats', message_stats)
             
             print(f"{Fore.GREEN}✓ Exported limited message statistics from {channels_sampled} channels{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}Failed to export message stats: {str(e)}{Style.RESET_ALL}")
 
+    async def export_message_history(self):
+        """Export the full message history of every readable text, announcement and thread channel"""
+        if not self.is_token_auth:
+            print(f"{Fore.YELLOW}Cannot export message history without token authentication.{Style.RESET_ALL}")
+            return
+            
+        try:
+            directory = self.get_data_dir('messages')
+            guild_channels = self.export_data.get('guild_channels', {})
+            
+            # Threads are not part of the channel list, look them up per guild
+            guild_threads = await asyncio.gather(*(
+                self.fetch_guild_threads(guild_id, channels) for guild_id, channels in guild_channels.items()
+            ))
+            
+            queue = asyncio.Queue()
+            for (guild_id, channels), threads in zip(guild_channels.items(), guild_threads):
+                for channel in channels + threads:
+                    if channel.get('type') not in MESSAGE_CHANNEL_TYPES or not channel.get('id'):
+                        continue
+                    last_message_id = channel.get('last_message_id')
+                    if self.message_since is not None and last_message_id and int(last_message_id) <= self.message_since:
+                        # Nothing was posted in the requested period
+                        continue
+                    queue.put_nowait((guild_id, channel))
+            
+            history = {}
+            incomplete_channels = []
+            
+            # Message routes are bucketed per channel, so channels can be walked in parallel
+            async def worker():
+                while not queue.empty():
+                    guild_id, channel = queue.get_nowait()
+                    channel_id = channel['id']
+                    os.makedirs(os.path.join(directory, guild_id), exist_ok=True)
+                    path = os.path.join(directory, guild_id, f"{channel_id}.ndjson.gz")
+                    try:
+                        exported, complete = await self.export_channel_messages(channel_id, path)
+                    except Exception as e:
+                        print(f"{Fore.YELLOW}Could not export messages of channel {channel_id}: {str(e)}{Style.RESET_ALL}")
+                        exported, complete = 0, False
+                    if not complete:
+                        incomplete_channels.append(channel_id)
+                    if exported:
+                        history[channel_id] = {
+                            "guild_id": guild_id,
+                            "name": channel.get('name'),
+                            "type": channel.get('type'),
+                            "messages": exported,
+                            "file": path
+                        }
+            
+            await asyncio.gather(*(worker() for _ in range(min(self.max_concurrency, queue.qsize()))))
+            
+            total_messages = sum(channel['messages'] for channel in history.values())
+            self.store_component('message_history', {
+                "channels": history,
+                "total_messages": total_messages,
+                "incomplete_channels": incomplete_channels,
+                "since_snowflake": self.message_since,
+                "until_snowflake": self.message_until,
+                "message_files": directory
+            }, items=total_messages)
+            if incomplete_channels:
+                self.partial_components.add('message_history')
+            
+            print(f"{Fore.GREEN}✓ Exported {total_messages} messages from {len(history)} channels to {directory}{Style.RESET_ALL}")
+        except Exception as e:
+            print(f"{Fore.RED}Failed to export message history: {str(e)}{Style.RESET_ALL}")
+
+    async def fetch_guild_threads(self, guild_id: str, channels: List[Dict]) -> List[Dict]:
+        """List the active threads of a guild and the archived public threads of its channels"""
+        threads = {}
+        
+        active = await self.make_request(f'/guilds/{guild_id}/threads/active')
+        if isinstance(active, dict):
+            for thread in active.get('threads', []):
+                threads[thread.get('id')] = thread
+        
+        async def fetch_archived(channel_id):
+            before = None
+            while True:
+                endpoint = f'/channels/{channel_id}/threads/archived/public?limit=100'
+                if before:
+                    endpoint += f'&before={urllib.parse.quote(before)}'
+                page = await self.make_request(endpoint)
+                page_threads = page.get('threads', []) if isinstance(page, dict) else []
+                for thread in page_threads:
+                    threads[thread.get('id')] = thread
+                if not page_threads or not page.get('has_more'):
+                    break
+                before = page_threads[-1].get('thread_metadata', {}).get('archive_timestamp')
+                if not before:
+                    break
+        
+        await asyncio.gather(*(
+            fetch_archived(channel['id']) for channel in channels
+            if channel.get('type') in THREAD_PARENT_CHANNEL_TYPES and channel.get('id')
+        ))
+        return list(threads.values())
+
+    async def export_channel_messages(self, channel_id: str, path: str) -> Tuple[int, bool]:
+        """Walk a channel's history and stream it to a gzipped NDJSON file
+
+        With a since bound the history is walked forward from it, oldest message
+        first, otherwise backward from the until bound or the newest message.
+        Returns the number of messages written and whether the walk completed, it
+        did not when a page could not be fetched. Every page is appended as its
+        own gzip member, so the file stays valid at each checkpoint and an
+        interrupted channel continues from its last fetched page.
+        """
+        unit = f"messages/{channel_id}"
+        checkpoint = self.journal.get_cursor(unit) if self.journal else None
+        # A bound before 2015 is snowflake 0, which is still a bound
+        forward = self.message_since is not None
+        exported = 0
+        cursor = self.message_since if forward else self.message_until
+        mode = 'wb'
+        # Without its file the checkpoint is of no use, start the channel over.
+        # A channel without any message in range has no file.
+        if checkpoint and checkpoint["done"] and (not checkpoint["count"] or os.path.exists(path)):
+            return checkpoint["count"], True
+        if checkpoint and not checkpoint["done"] and os.path.exists(path):
+            exported, cursor = checkpoint["count"], checkpoint["cursor"]
+            with open(path, 'r+b') as f:
+                f.truncate(checkpoint["offset"])
+            mode = 'ab'
+        
+        complete = True
+        with open(path, mode) as f:
+            while True:
+                endpoint = f'/channels/{channel_id}/messages?limit={MESSAGES_PAGE_SIZE}'
+                if cursor is not None:
+                    endpoint += f'&{"after" if forward else "before"}={cursor}'
+                try:
+                    messages = await self.make_request(endpoint, strict=True)
+                except RequestFailed as e:
+                    print(f"{Fore.YELLOW}History of channel {channel_id} is incomplete: {str(e)}{Style.RESET_ALL}")
+                    complete = False
+                    break
+                if not messages:
+                    if self.journal:
+                        self.journal.save_cursor(unit, cursor, exported, f.tell(), done=True)
+                    break
+                
+                # Pages come newest first in both directions
+                messages = sorted(messages, key=lambda message: int(message['id']), reverse=not forward)
+                reached_until = False
+                page = []
+                for message in messages:
+                    if forward and self.message_until is not None and int(message['id']) >= self.message_until:
+                        reached_until = True
+                        break
+                    page.append(message)
+                exported += await self.offload(write_gzip_member, f, page)
+                
+                cursor = messages[-1]['id']
+                done = reached_until or len(messages) < MESSAGES_PAGE_SIZE
+                if self.journal:
+                    f.flush()
+                    self.journal.save_cursor(unit, cursor, exported, f.tell(), done=done)
+                if done:
+                    break
+        
+        if not exported:
+            os.remove(path)
+        return exported, complete
+
     async def export_gateway_info(self):
         """Export gateway connection information"""
         if not self.is_token_auth:
@@ -943,7 +3076,7 @@ class DiscordExporter:
             
         try:
             gateway_info = await self.make_request('/gateway/bot')
-            self.export_data['gateway_info'] = gateway_info
+            self.store_component('gateway_info', gateway_info)
             
             print(f"{Fore.GREEN}✓ Exported gateway connection information{Style.RESET_ALL}")
         except Exception as e:
@@ -982,7 +3115,7 @@ class DiscordExporter:
                 cover_url = f"https://cdn.discordapp.com/app-assets/{application_id}/store/{assets['cover_image']}.png"
                 assets["asset_urls"].append({"type": "cover_image", "url": cover_url})
             
-            self.export_data['application_assets'] = assets
+            self.store_component('application_assets', assets)
             
             print(f"{Fore.GREEN}✓ Exported application assets information{Style.RESET_ALL}")
         except Exception as e:
@@ -992,20 +3125,20 @@ class DiscordExporter:
         """Compile bot usage statistics summary"""
         try:
             stats = {
-                "guilds": len(self.export_data.get('guilds', [])),
-                "commands": len(self.export_data.get('global_commands', [])),
-                "guild_specific_commands": sum(len(cmds) for cmds in self.export_data.get('guild_commands', {}).values()),
-                "members_total": self.export_data.get('member_counts', {}).get('total_members', 0),
-                "channels": sum(len(channels) for channels in self.export_data.get('guild_channels', {}).values()),
-                "webhooks": sum(len(webhooks) for webhooks in self.export_data.get('guild_webhooks', {}).values()),
-                "emojis": sum(len(emojis) for emojis in self.export_data.get('guild_emojis', {}).values()),
-                "stickers": sum(len(stickers) for stickers in self.export_data.get('guild_stickers', {}).values()),
-                "scheduled_events": sum(len(events) for events in self.export_data.get('guild_events', {}).values()),
-                "roles": sum(len(roles) for roles in self.export_data.get('guild_roles', {}).values()),
-                "integrations": sum(len(integrations) for integrations in self.export_data.get('guild_integrations', {}).values())
+                "guilds": self.count_items('guilds'),
+                "commands": self.count_items('global_commands'),
+                "guild_specific_commands": self.count_items('guild_commands'),
+                "members_total": self.count_items('member_counts'),
+                "channels": self.count_items('guild_channels'),
+                "webhooks": self.count_items('guild_webhooks'),
+                "emojis": self.count_items('guild_emojis'),
+                "stickers": self.count_items('guild_stickers'),
+                "scheduled_events": self.count_items('guild_events'),
+                "roles": self.count_items('guild_roles'),
+                "integrations": self.count_items('guild_integrations')
             }
             
-            self.export_data['usage_stats_summary'] = stats
+            self.store_component('usage_stats_summary', stats)
             
             print(f"{Fore.GREEN}✓ Compiled bot usage statistics summary{Style.RESET_ALL}")
         except Exception as e:
@@ -1021,7 +3154,7 @@ class DiscordExporter:
                 "bot_id": self.bot_id
             }
             
-            self.export_data['public_info'] = public_info
+            self.store_component('public_info', public_info)
             
             print(f"{Fore.YELLOW}Public bot information lookup not fully implemented{Style.RESET_ALL}")
         except Exception as e:
@@ -1042,7 +3175,7 @@ class DiscordExporter:
                 "privacy_policy_url": self.export_data.get('application_info', {}).get('privacy_policy_url')
             }
             
-            self.export_data['oauth2_info'] = oauth2_info
+            self.store_component('oauth2_info', oauth2_info)
             
             print(f"{Fore.GREEN}✓ Exported OAuth2 application information{Style.RESET_ALL}")
         except Exception as e:
@@ -1067,7 +3200,7 @@ class DiscordExporter:
             if session_start_limit:
                 connection_info['session_start_limit'] = session_start_limit
             
-            self.export_data['connection_info'] = connection_info
+            self.store_component('connection_info', connection_info)
             
             print(f"{Fore.GREEN}✓ Exported bot connection information{Style.RESET_ALL}")
         except Exception as e:
@@ -1100,7 +3233,7 @@ class DiscordExporter:
                 
             # More intent checks could be added
             
-            self.export_data['intents_analysis'] = intents_analysis
+            self.store_component('intents_analysis', intents_analysis)
             
             print(f"{Fore.GREEN}✓ Exported intents usage analysis{Style.RESET_ALL}")
         except Exception as e:
@@ -1123,7 +3256,7 @@ class DiscordExporter:
             if session_start_limit:
                 rate_limits['session_start_limit'] = session_start_limit
             
-            self.export_data['rate_limits'] = rate_limits
+            self.store_component('rate_limits', rate_limits)
             
             print(f"{Fore.GREEN}✓ Exported rate limit information{Style.RESET_ALL}")
         except Exception as e:
@@ -1138,70 +3271,152 @@ class DiscordExporter:
                 "discord_api_version": 10,
                 "bot_id": self.bot_id,
                 "export_method": "token" if self.is_token_auth else "bot_id",
-                "export_components": list(self.export_data.keys())
+                "export_components": list(self.component_stats.keys()),
+                "retry_stats": self.retry_policy.metrics,
+                "concurrency": self.concurrency_controller.metrics(),
+                "coalesced_requests": self.coalesced_requests,
+                "json_backend": "orjson" if orjson else "json",
+                "request_stats": self.request_stats.summary()
             }
-            
-            self.export_data['metadata'] = metadata
+            if self.response_cache:
+                metadata["response_cache"] = self.response_cache.stats
+            if self.cassette:
+                metadata["cassette"] = dict(self.cassette.stats, path=self.cassette.path, replay=self.cassette.replaying)
+            if self.previous_snapshot is not None:
+                metadata["base_export_time"] = (self.previous_snapshot.load('metadata') or {}).get('export_time')
+                metadata["unchanged_guilds"] = len(self.unchanged_guilds)
+            if self.change_indicators:
+                metadata["change_indicators"] = self.change_indicators
+            if self.failed_guild_units:
+                metadata["failed_guild_units"] = self.failed_guild_units
+            
+            self.store_component('metadata', metadata)
             
             print(f"{Fore.GREEN}✓ Added export metadata{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}Failed to add metadata: {str(e)}{Style.RESET_ALL}")
 
-    async def run_export(self):
-        """Run the full export process with all enabled functions"""
+    async def run_exporter(self, name: str, dependencies: List[asyncio.Task]):
+        """Run a single exporter once all of its dependencies have finished"""
+        if dependencies:
+            await asyncio.gather(*dependencies)
+        if self.auth_failed:
+            return
+        if self.journal and self.journal.is_exporter_done(name):
+            self.restore_exporter(name)
+            return
+        started = time.monotonic()
+        # Each exporter runs in its own task, so the tasks it starts share this list
+        failed = []
+        FAILED_REQUESTS.set(failed)
+        await getattr(self, name)()
+        self.request_stats.exporters[name] = round(time.monotonic() - started, 3)
+        requires, provides = EXPORT_GRAPH[name]
+        if failed and not self.auth_failed:
+            print(f"{Fore.YELLOW}{name} is incomplete, {len(failed)} of its requests failed{Style.RESET_ALL}")
+        # Built from incomplete components, so incomplete itself
+        if failed or any(key in self.partial_components for key in requires):
+            self.partial_components.update(key for key in provides if key in self.component_stats)
+        # An exporter that failed part way is not recorded and runs again on resume
+        if self.journal and not self.auth_failed and all(
+                key in self.component_stats and key not in self.partial_components for key in provides):
+            self.journal.mark_exporter_done(name, {
+                key: {"stats": self.component_stats[key], "sliced": key in self.sliced_components}
+                for key in provides
+            })
+
+    def restore_exporter(self, name: str):
+        """Load the components of an exporter that completed in an earlier run from the journal"""
+        guild_positions = {guild.get('id'): index for index, guild in enumerate(self.export_data.get('guilds', []))}
+        for key, entry in self.journal.completed_exporters[name].items():
+            keep = self.writer is None or key in self.retained_components
+            if entry["sliced"]:
+                value = {}
+                for guild_id, guild_slice in self.journal.iter_guild_slices(key):
+                    if not guild_slice:
+                        continue
+                    if self.writer:
+                        self.writer.write_guild_slice(key, guild_id, guild_slice)
+                    if keep:
+                        value[guild_id] = guild_slice
+                value = dict(sorted(value.items(), key=lambda item: guild_positions.get(item[0], len(guild_positions))))
+                if self.writer:
+                    self.writer.close_component(key)
+                    if key not in self.writer.manifest:
+                        self.writer.write_component(key, value)
+            else:
+                value = self.journal.load_component(key)
+                if self.writer:
+                    self.writer.write_component(key, value)
+            
+            self.component_stats[key] = entry["stats"]
+            if keep:
+                self.export_data[key] = value
+        print(f"{Fore.GREEN}✓ Restored {name.replace('export_', '')} from checkpoint{Style.RESET_ALL}")
+
+    async def run_export_graph(self, names: List[str]):
+        """Run exporters concurrently, ordered by the components they read and write"""
+        producers = {}
+        for name in names:
+            for key in EXPORT_GRAPH[name][1]:
+                producers[key] = name
+        
+        # Streamed components stay in memory only while another exporter reads them
+        self.retained_components = set()
+        for name in names:
+            if name not in COUNT_ONLY_EXPORTERS:
+                self.retained_components.update(EXPORT_GRAPH[name][0])
+        
+        # Per-guild exporters share one guild pipeline, which needs all of their inputs
+        self.pipeline_exporters = [
+            name for name in names
+            if name in GUILD_RESOURCES and not (self.journal and self.journal.is_exporter_done(name))
+        ]
+        self.guild_pipeline = None
+        pipeline_requires = set()
+        for name in self.pipeline_exporters:
+            pipeline_requires.update(EXPORT_GRAPH[name][0])
+        
+        tasks = {}
+        
+        def schedule(name):
+            if name not in tasks:
+                requires = pipeline_requires if name in GUILD_RESOURCES else EXPORT_GRAPH[name][0]
+                dependencies = [schedule(producers[key]) for key in requires if key in producers]
+                tasks[name] = asyncio.ensure_future(self.run_exporter(name, dependencies))
+            return tasks[name]
+        
+        for name in names:
+            schedule(name)
+        await asyncio.gather(*tasks.values())
+        
+        # Completion order is not deterministic, keep the declared component order
+        self.export_data = dict(sorted(self.export_data.items(), key=lambda item: component_position(item[0])))
+
+    async def run_export(self, exporters: Optional[List[str]] = None):
+        """Run the full export process with all enabled functions
+
+        By default every exporter except the opt-in ones is run.
+        """
+        if exporters is None:
+            exporters = [name for name in EXPORT_GRAPH if name not in OPT_IN_EXPORTERS]
+        self.selected_components = {key for name in exporters for key in EXPORT_GRAPH[name][1]} | {'metadata'}
+        self.open_default_writer()
+        
         start_time = time.time()
         
         print(f"{Fore.CYAN}Starting Discord bot export...{Style.RESET_ALL}")
         
-        # Basic info first
-        await self.export_basic_info()
-        
-        # Main data export functions
-        export_functions = [
-            self.export_guilds,
-            self.export_commands,
-            self.export_permissions,
-            self.export_channels,
-            self.export_webhooks,
-            self.export_interactions,
-            self.export_presence,
-            self.export_voice_settings,
-            self.export_emoji,
-            self.export_stickers,
-            self.export_scheduled_events,
-            self.export_roles,
-            self.export_invites,
-            self.export_bans,
-            self.export_audit_logs,
-            self.export_widget_settings,
-            self.export_integrations,
-            self.export_templates,
-            self.export_welcome_screens,
-            self.export_auto_moderation,
-            self.export_stage_instances,
-            self.export_application_role_connections,
-            self.export_entitlements,
-            self.export_application_skus,
-            self.export_auth_url,
-            self.export_member_counts,
-            self.export_message_stats,
-            self.export_gateway_info,
-            self.export_application_assets,
-            self.export_bot_usage_stats,
-            self.export_public_bot_info,
-            self.export_oauth2_info,
-            self.export_connection_info,
-            self.export_intents_info,
-            self.export_rate_limit_info,
-        ]
-        
-        # Execute all export functions
-        for func in export_functions:
-            await func()
+        # Run every exporter as soon as the components it reads are available
+        await self.run_export_graph(exporters)
         
         # Add metadata last
         await self.export_metadata()
         
+        if self.writer:
+            self.writer.close()
+            self.writer.write_manifest(self.component_stats)
+        
         # Close the session
         await self.close_session()
         
@@ -1209,20 +3424,204 @@ class DiscordExporter:
         duration = time.time() - start_time
         
         print(f"\n{Fore.GREEN}Export completed in {duration:.2f} seconds!{Style.RESET_ALL}")
-        print(f"{Fore.CYAN}Exported {len(self.export_data)} data components.{Style.RESET_ALL}")
+        print(f"{Fore.CYAN}Exported {len(self.component_stats)} data components.{Style.RESET_ALL}")
+        
+        return self.export_data
+
+    async def run_sharded_export(self, exporters: List[str], workers: int):
+        """Run an export split over several worker processes, each exporting a shard of the guilds
+
+        The guild list is partitioned round-robin. Every worker gets an equal part
+        of the global rate limit and streams its components to its own directory;
+        the first worker also exports the components that don't depend on guilds. The
+        shard outputs are merged into the usual components before the summarising
+        exporters and the metadata run here.
+        """
+        start_time = time.time()
+        print(f"{Fore.CYAN}Starting Discord bot export with {workers} worker processes...{Style.RESET_ALL}")
+        
+        self.open_default_writer()
+        guilds = [guild async for page in self.iter_guild_pages() for guild in page if guild.get('id')]
+        workers = max(1, min(workers, len(guilds)))
+        
+        sharded = [name for name in exporters if name not in SHARD_AGGREGATE_EXPORTERS]
+        guild_exporters = [name for name in sharded if "export_guilds" in resolve_exporters([name])]
+        # The other shards fall back to the bot ID for the application ID instead of exporting the application
+        shard_exporters = [sharded] + [[
+            name for name in resolve_exporters(guild_exporters) if "export_guilds" in resolve_exporters([name])
+        ]] * (workers - 1)
+        aggregates = [name for name in exporters if name in SHARD_AGGREGATE_EXPORTERS]
+        
+        shards_dir = self.get_data_dir('shards')
+        options = {
+            "concurrency": self.concurrency,
+            "max_concurrency": self.max_concurrency,
+            "cache_file": self.cache_file,
+            "refresh_cache": self.refresh_cache,
+            "pool_size": self.pool_size,
+            "pool_size_per_host": self.pool_size_per_host,
+            "request_timeout": self.request_timeout,
+            "data_dir": os.path.dirname(shards_dir),
+            "message_since": self.message_since,
+            "message_until": self.message_until,
+            "shared_ratelimit_dir": self.shared_ratelimit_dir,
+            # A shared store already splits the budget between the workers
+            "global_limit": (GLOBAL_RATE_LIMIT if self.shared_ratelimit_dir is not None
+                             else max(1, GLOBAL_RATE_LIMIT // workers)),
+            "api_endpoint": API_ENDPOINT
+        }
+        directories = [os.path.join(shards_dir, str(index)) for index in range(workers)]
+        
+        loop = asyncio.get_running_loop()
+        # Spawned workers start without the event loop of this process
+        with concurrent.futures.ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            await asyncio.gather(*(
+                loop.run_in_executor(pool, run_export_shard, self.token, guilds[index::workers],
+                                     shard_exporters[index], directories[index], options, index > 0)
+                for index in range(workers)
+            ))
+        
+        # Only the inputs of the summarising exporters have to stay in memory
+        self.retained_components = set()
+        for name in aggregates:
+            if name not in COUNT_ONLY_EXPORTERS:
+                self.retained_components.update(EXPORT_GRAPH[name][0])
+        self.merge_shards(directories, guilds)
+        shutil.rmtree(shards_dir, ignore_errors=True)
+        
+        await self.run_export_graph(aggregates)
+        await self.export_metadata()
+        
+        if self.writer:
+            self.writer.close()
+            self.writer.write_manifest(self.component_stats)
+        await self.close_session()
+        
+        duration = time.time() - start_time
+        print(f"\n{Fore.GREEN}Export completed in {duration:.2f} seconds!{Style.RESET_ALL}")
+        print(f"{Fore.CYAN}Exported {len(self.component_stats)} data components.{Style.RESET_ALL}")
         
         return self.export_data
 
+    def merge_shards(self, directories: List[str], guilds: List[Dict]):
+        """Combine the component files written by the shards of a sharded export"""
+        manifests = []
+        for directory in directories:
+            with open(os.path.join(directory, "manifest.json"), 'r', encoding='utf-8') as f:
+                manifests.append(json.load(f)["components"])
+        guild_positions = {guild['id']: index for index, guild in enumerate(guilds)}
+        
+        def load(directory, entry):
+            with open(os.path.join(directory, entry["file"]), 'rb') as f:
+                return load_json(f.read())
+        
+        def iter_guild_slices(directory, entry):
+            if entry["file"].endswith(".ndjson"):
+                with open(os.path.join(directory, entry["file"]), 'rb') as f:
+                    for line in f:
+                        yield load_json(line)
+            else:
+                yield from load(directory, entry).items()
+        
+        keys = sorted({key for manifest in manifests for key in manifest if key != 'metadata'}, key=component_position)
+        for key in keys:
+            parts = [(directory, manifest[key]) for directory, manifest in zip(directories, manifests) if key in manifest]
+            
+            if key in GUILD_LIST_COMPONENTS:
+                merged = [guild for directory, entry in parts for guild in load(directory, entry)]
+                merged.sort(key=lambda guild: guild_positions.get(guild.get('id'), len(guild_positions)))
+                self.store_component(key, merged)
+            elif key in PER_GUILD_COMPONENTS:
+                # Stream the slices through the writer, merging them guild by guild
+                keep = self.writer is None or key in self.retained_components
+                merged = {}
+                stats = {"items": 0, "guilds": 0}
+                for directory, entry in parts:
+                    for guild_id, guild_slice in iter_guild_slices(directory, entry):
+                        stats["items"] += count_items(guild_slice)
+                        stats["guilds"] += 1
+                        if self.writer:
+                            self.writer.write_guild_slice(key, guild_id, guild_slice)
+                        if keep:
+                            merged[guild_id] = guild_slice
+                merged = dict(sorted(merged.items(), key=lambda item: guild_positions.get(item[0], len(guild_positions))))
+                self.component_stats[key] = stats
+                self.sliced_components.add(key)
+                self.store_component(key, merged)
+            elif key == 'member_counts':
+                self.store_component(key, self.merge_member_counts([load(directory, entry) for directory, entry in parts],
+                                                                   guild_positions),
+                                     items=sum(entry.get("items", 0) for _, entry in parts))
+            elif key == 'message_history':
+                values = [load(directory, entry) for directory, entry in parts]
+                channels = {}
+                incomplete_channels = []
+                for value in values:
+                    channels.update(value.get("channels", {}))
+                    incomplete_channels.extend(value.get("incomplete_channels", []))
+                total_messages = sum(value.get("total_messages", 0) for value in values)
+                self.store_component(key, dict(values[0], channels=channels, total_messages=total_messages,
+                                               incomplete_channels=incomplete_channels), items=total_messages)
+            else:
+                # Components that don't depend on guilds come from the first shard
+                self.store_component(key, load(*parts[0]))
+
+    def merge_member_counts(self, values: List[Dict[str, Any]], guild_positions: Dict[str, int]) -> Dict[str, Any]:
+        """Combine the member counts of several shards, recounting the unique members from the member files
+
+        The guilds are put back in the order of the guild list.
+        """
+        guild_counts = {}
+        exported_members = {}
+        incomplete_guilds = []
+        for value in values:
+            guild_counts.update(value.get("guild_counts", {}))
+            exported_members.update(value.get("exported_members", {}))
+            incomplete_guilds.extend(value.get("incomplete_guilds", []))
+        
+        def position(guild_id):
+            return guild_positions.get(guild_id, len(guild_positions))
+        guild_counts = dict(sorted(guild_counts.items(), key=lambda item: position(item[0])))
+        exported_members = dict(sorted(exported_members.items(), key=lambda item: position(item[0])))
+        incomplete_guilds.sort(key=position)
+        
+        directory = values[0].get("member_files")
+        unique_members = set()
+        for guild_id in exported_members:
+            with open(os.path.join(directory, f"{guild_id}.ndjson"), 'rb') as f:
+                for line in f:
+                    user_id = load_json(line).get('user', {}).get('id')
+                    if user_id:
+                        unique_members.add(int(user_id))
+        
+        return {
+            "guild_counts": guild_counts,
+            "total_members": sum(guild_counts.values()),
+            "unique_members_found": len(unique_members),
+            "exported_members": exported_members,
+            "total_exported_members": sum(exported_members.values()),
+            "incomplete_guilds": incomplete_guilds,
+            "member_files": directory
+        }
+
     def save_to_file(self, filename: str = None):
         """Save the exported data to a JSON file"""
+        if isinstance(self.writer, PartitionedExportWriter):
+            # The partitions are the export, there is no single file to assemble
+            print(f"{Fore.GREEN}Export saved to {self.writer.directory}{Style.RESET_ALL}")
+            return self.writer.directory
+        
         if not filename:
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            bot_identifier = self.bot_id if self.bot_id else "unknown"
-            filename = f"discord_bot_export_{bot_identifier}_{timestamp}.json"
+            filename = f"{self.get_default_name()}.json"
         
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(self.export_data, f, indent=2)
+            if self.writer:
+                # Components were streamed to disk during the export
+                with open(filename, 'w', encoding='utf-8') as f:
+                    self.writer.assemble(f)
+            else:
+                with open(filename, 'wb') as f:
+                    f.write(dump_json(self.export_data, indent=2))
             
             print(f"{Fore.GREEN}Export saved to {filename}{Style.RESET_ALL}")
             return filename
@@ -1231,6 +3630,48 @@ class DiscordExporter:
             return None
 
 
+    def save_delta(self, filename: str = None):
+        """Save the changes in the selected components since the previous snapshot to a delta JSON file"""
+        if not filename:
+            filename = f"{self.get_default_name()}.delta.json"
+        
+        try:
+            # A streamed export is compared from its component files
+            current = ExportSnapshot(data=self.export_data, reader=self.writer)
+            delta = compute_delta(self.previous_snapshot, current, self.selected_components, self.partial_components)
+            with open(filename, 'wb') as f:
+                f.write(dump_json(delta, indent=2))
+            
+            print(f"{Fore.GREEN}Delta with {len(delta['changed'])} changed components saved to {filename}{Style.RESET_ALL}")
+            return filename
+        except Exception as e:
+            print(f"{Fore.RED}Failed to save delta: {str(e)}{Style.RESET_ALL}")
+            return None
+
+
+def run_export_shard(token: str, guilds: List[Dict], exporters: List[str], directory: str,
+                     options: Dict[str, Any], guilds_only: bool = False) -> Dict[str, Dict[str, int]]:
+    """Worker process of a sharded export: export the given guilds into a directory
+
+    With guilds_only set the shard leaves the components that don't depend on
+    guilds to the first shard.
+    """
+    global API_ENDPOINT
+    options = dict(options)
+    API_ENDPOINT = options.pop("api_endpoint")
+    global_limit = options.pop("global_limit")
+    
+    async def run():
+        exporter = DiscordExporter(stream_dir=directory, **options)
+        exporter.rate_limiter = RateLimiter(global_limit)
+        exporter.set_token(token)
+        exporter.shard_guilds = guilds
+        exporter.guilds_only_shard = guilds_only
+        await exporter.run_export(exporters)
+        return exporter.component_stats
+    
+    return asyncio.run(run())
+
 def print_discord_banner():
     """Print a fancy Discord-themed banner"""
     print(DISCORD_LOGO)
@@ -1265,8 +3706,9 @@ def list_all_functions():
         f"{Fore.LIGHTMAGENTA_EX}export_entitlements{Fore.RESET} - Export application entitlements",
         f"{Fore.LIGHTMAGENTA_EX}export_application_skus{Fore.RESET} - Export application SKUs",
         f"{Fore.LIGHTMAGENTA_EX}export_auth_url{Fore.RESET} - Generate authorization URL",
-        f"{Fore.LIGHTMAGENTA_EX}export_member_counts{Fore.RESET} - Export member count statistics",
+        f"{Fore.LIGHTMAGENTA_EX}export_member_counts{Fore.RESET} - Export member counts and full member lists",
         f"{Fore.LIGHTMAGENTA_EX}export_message_stats{Fore.RESET} - Export message statistics",
+        f"{Fore.LIGHTMAGENTA_EX}export_message_history{Fore.RESET} - Export full message history (--messages)",
         f"{Fore.LIGHTMAGENTA_EX}export_gateway_info{Fore.RESET} - Export gateway connection information",
         f"{Fore.LIGHTMAGENTA_EX}export_application_assets{Fore.RESET} - Export application assets",
         f"{Fore.LIGHTMAGENTA_EX}export_bot_usage_stats{Fore.RESET} - Compile bot usage statistics",
@@ -1329,6 +3771,190 @@ def list_all_functions():
     
     print(f"\n{Fore.CYAN}=================================================={Fore.RESET}")
 
+def create_exporter(args, connector: Optional[aiohttp.TCPConnector] = None,
+                    exit_on_auth_failure: bool = True) -> DiscordExporter:
+    """Create an exporter configured from the command line arguments"""
+    stream_dir = args.stream_dir
+    if args.output_format == "ndjson" and not stream_dir:
+        # The partitioned export is a directory, -o names it, otherwise the exporter does
+        stream_dir = args.output
+    return DiscordExporter(
+        concurrency=args.concurrency,
+        max_concurrency=args.max_concurrency,
+        # Cached responses would be missing from a cassette
+        cache_file=None if args.no_cache or args.record or args.replay else args.cache_file,
+        refresh_cache=args.refresh,
+        pool_size=args.pool_size,
+        pool_size_per_host=args.pool_size_per_host,
+        request_timeout=args.timeout,
+        stream_dir=stream_dir,
+        # Bulk data goes next to the export file unless it is streamed to a directory
+        data_dir=args.data_dir or (f"{os.path.splitext(args.output)[0]}_data" if args.output and not stream_dir else None),
+        message_since=datetime_to_snowflake(args.since) if args.since is not None else None,
+        message_until=datetime_to_snowflake(args.until) if args.until is not None else None,
+        connector=connector,
+        shared_ratelimit_dir=args.shared_ratelimit,
+        record_file=args.record,
+        replay_file=args.replay,
+        replay_pace=args.replay_pace,
+        output_format=args.output_format,
+        exit_on_auth_failure=exit_on_auth_failure
+    )
+
+def get_export_functions(args) -> List[str]:
+    """Return the exporters selected on the command line, in EXPORT_GRAPH order"""
+    if args.function:
+        exporters = resolve_exporters(args.function.split(','))
+    else:
+        exporters = [name for name in EXPORT_GRAPH if name not in OPT_IN_EXPORTERS]
+    if args.messages and "export_message_history" not in exporters:
+        exporters = resolve_exporters(exporters + ["export_message_history"])
+    return exporters
+
+async def run_cli_export(exporter: DiscordExporter, args, exporters: List[str]) -> Optional[str]:
+    """Run an export as configured on the command line and save it, returning the saved file"""
+    sharded = args.workers > 1 and exporter.is_token_auth
+    if sharded and (args.since_snapshot or args.checkpoint or args.resume or args.record or args.replay):
+        print(f"{Fore.RED}--workers can't be combined with --since-snapshot, --checkpoint, --resume, "
+              f"--record or --replay.{Style.RESET_ALL}")
+        await exporter.close_session()
+        return None
+    
+    if args.since_snapshot:
+        if exporter.writer and os.path.isdir(args.since_snapshot) and \
+                os.path.realpath(args.since_snapshot) == os.path.realpath(exporter.writer.directory):
+            print(f"{Fore.RED}--since-snapshot can't read the directory the export is written to.{Style.RESET_ALL}")
+            await exporter.close_session()
+            return None
+        try:
+            exporter.load_snapshot(args.since_snapshot)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"{Fore.RED}Failed to load snapshot {args.since_snapshot}: {str(e)}{Style.RESET_ALL}")
+            await exporter.close_session()
+            return None
+    
+    journal_dir = args.resume or args.checkpoint
+    if journal_dir:
+        try:
+            exporter.journal = ExportJournal(journal_dir, exporter.bot_id, resume=bool(args.resume))
+        except ValueError as e:
+            print(f"{Fore.RED}Cannot resume export: {str(e)}{Style.RESET_ALL}")
+            await exporter.close_session()
+            return None
+        if args.resume:
+            print(f"{Fore.CYAN}Resuming from {journal_dir} with {len(exporter.journal.completed_exporters)} "
+                  f"exporters already complete{Style.RESET_ALL}")
+    
+    try:
+        if sharded:
+            export_data = await exporter.run_sharded_export(exporters, args.workers)
+        else:
+            export_data = await exporter.run_export(exporters)
+    except BaseException:
+        if journal_dir:
+            print(f"\n{Fore.YELLOW}Progress is saved in {journal_dir}, "
+                  f"run again with --resume {journal_dir} to continue.{Style.RESET_ALL}")
+        raise
+    finally:
+        if exporter.journal:
+            exporter.journal.close()
+    if exporter.auth_failed:
+        print(f"{Fore.RED}Export of bot {exporter.bot_id} aborted, its token was rejected.{Style.RESET_ALL}")
+        return None
+    
+    # Handle output
+    saved_file = None
+    if not args.no_save:
+        # Other bots of a batch keep exporting while the file is encoded and written
+        saved_file = await exporter.offload(exporter.save_to_file, args.output)
+    else:
+        # Print to stdout
+        if exporter.writer:
+            exporter.writer.assemble(sys.stdout, pretty=args.pretty)
+            print()
+        else:
+            indent = 2 if args.pretty else None
+            print(dump_json(export_data, indent=indent).decode('utf-8'))
+    
+    if args.since_snapshot:
+        await exporter.offload(exporter.save_delta, args.delta_output)
+    if args.stats:
+        exporter.request_stats.print_summary()
+    if exporter.replay_incomplete():
+        print(f"{Fore.RED}Replay incomplete: {exporter.cassette.stats['missing']} requests had no recorded "
+              f"response in {exporter.cassette.path}, the export has gaps.{Style.RESET_ALL}")
+    return saved_file
+
+async def run_batch_export(args):
+    """Export every bot of a tokens file concurrently over one shared connection pool
+
+    The bots share the pool's connection limit and one queue of compression and
+    file writing jobs. Everything else is scheduled per bot: each keeps its own
+    rate limits and its own limit of requests in flight. Directories given on the
+    command line get a subdirectory per bot, and -o names the directory of the
+    exports.
+    """
+    try:
+        with open(args.tokens_file, 'r', encoding='utf-8') as f:
+            tokens = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    except OSError as e:
+        print(f"{Fore.RED}Failed to read tokens file: {str(e)}{Style.RESET_ALL}")
+        return
+    if args.since_snapshot:
+        print(f"{Fore.RED}--since-snapshot is not supported with --tokens-file.{Style.RESET_ALL}")
+        return
+    if args.record or args.replay:
+        print(f"{Fore.RED}--record and --replay are not supported with --tokens-file.{Style.RESET_ALL}")
+        return
+    try:
+        exporters = get_export_functions(args)
+    except ValueError as e:
+        print(f"{Fore.RED}{str(e)}. Use -H to list the available functions.{Style.RESET_ALL}")
+        return
+    
+    print(f"{Fore.CYAN}Exporting {len(tokens)} bots...{Style.RESET_ALL}")
+    start_time = time.time()
+    connector = create_connector(args.pool_size, args.pool_size_per_host)
+    offload_slots = asyncio.Semaphore(OFFLOAD_QUEUE_SIZE)
+    bot_slots = asyncio.Semaphore(args.parallel_bots if args.parallel_bots > 0 else max(1, len(tokens)))
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+    
+    async def export_bot(token):
+        bot_id = token_bot_id(token) or "unknown"
+        bot_args = argparse.Namespace(**vars(args))
+        for name in ("stream_dir", "data_dir", "checkpoint", "resume"):
+            if getattr(args, name):
+                setattr(bot_args, name, os.path.join(getattr(args, name), bot_id))
+        extension = "" if args.output_format == "ndjson" else ".json"
+        bot_args.output = os.path.join(args.output or ".", f"discord_bot_export_{bot_id}_{timestamp}{extension}")
+        
+        async with bot_slots:
+            # A rejected token fails this bot only, the others keep exporting
+            exporter = create_exporter(bot_args, connector, exit_on_auth_failure=False)
+            exporter.offload_slots = offload_slots
+            exporter.set_token(token)
+            try:
+                return await run_cli_export(exporter, bot_args, exporters)
+            except Exception as e:
+                print(f"{Fore.RED}Export of bot {bot_id} failed: {str(e)}{Style.RESET_ALL}")
+            finally:
+                await exporter.close_session()
+            return None
+    
+    try:
+        results = await asyncio.gather(*(export_bot(token) for token in tokens))
+    finally:
+        await connector.close()
+    
+    duration = time.time() - start_time
+    failed = [token_bot_id(token) or "unknown" for token, result in zip(tokens, results) if not result]
+    print(f"\n{Fore.GREEN}Exported {len(tokens) - len(failed)} of {len(tokens)} bots "
+          f"in {duration:.2f} seconds!{Style.RESET_ALL}")
+    if failed:
+        print(f"{Fore.RED}Failed bots: {', '.join(failed)}{Style.RESET_ALL}")
+
 async def main():
     """Main entry point for the Discord Bot Exporter tool"""
     
@@ -1343,14 +3969,76 @@ async def main():
     auth_group = parser.add_mutually_exclusive_group(required=True)
     auth_group.add_argument("-t", "--token", help="Bot token for comprehensive export")
     auth_group.add_argument("-id", "--botid", help="Bot ID for basic export")
+    auth_group.add_argument("--tokens-file",
+                            help="Export every bot whose token is listed in this file, one per line. The bots "
+                                 "share one connection pool and one queue of file writing jobs, their requests "
+                                 "are scheduled per bot")
     auth_group.add_argument("-H", "--list-functions", action="store_true", help="List all available functions")
     
-    parser.add_argument("-o", "--output", help="Output file name (default: auto-generated)")
-    parser.add_argument("-f", "--function", help="Export specific function only")
+    parser.add_argument("-o", "--output", help="Output file name, or directory with --output-format ndjson "
+                                               "(default: auto-generated)")
+    parser.add_argument("--output-format", choices=["json", "ndjson"], default="json",
+                        help="json writes one document; ndjson writes a directory with a manifest, <component>.ndjson "
+                             "files and guilds/<id>/<component>.ndjson per guild (default: json)")
+    parser.add_argument("-f", "--function",
+                        help="Comma-separated export functions to run, e.g. export_bans,export_audit_logs "
+                             "(the exporters they depend on are added automatically)")
     parser.add_argument("-q", "--quiet", action="store_true", help="Quiet mode (less verbose output)")
     parser.add_argument("-p", "--pretty", action="store_true", help="Pretty print the JSON output")
     parser.add_argument("--no-save", action="store_true", help="Don't save to file, print to stdout instead")
     parser.add_argument("--debug", action="store_true", help="Enable debug mode")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Number of API requests in flight to start with, the limit then adapts to the "
+                             f"API's responses up to --max-concurrency (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help="Ceiling of the adaptive number of requests in flight, set it to --concurrency "
+                             f"for a fixed limit (default: {DEFAULT_MAX_CONCURRENCY})")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE,
+                        help=f"Maximum number of pooled HTTP connections (default: {DEFAULT_POOL_SIZE})")
+    parser.add_argument("--pool-size-per-host", type=int, default=DEFAULT_POOL_SIZE_PER_HOST,
+                        help=f"Maximum number of pooled connections per host (default: {DEFAULT_POOL_SIZE_PER_HOST})")
+    parser.add_argument("--stream-dir", help="Stream each component to this directory as soon as it is exported, "
+                                               "keeping only summaries in memory")
+    parser.add_argument("--data-dir", help="Directory for bulk data such as full member lists "
+                                             "(default: the stream directory or discord_bot_export_<bot>_data)")
+    parser.add_argument("--messages", action="store_true",
+                        help="Also export the full message history of every readable channel")
+    parser.add_argument("--since", type=parse_datetime, help="Only export messages sent after this date (ISO format)")
+    parser.add_argument("--until", type=parse_datetime, help="Only export messages sent before this date (ISO format)")
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT,
+                        help=f"Timeout in seconds for a single API request (default: {REQUEST_TIMEOUT})")
+    parser.add_argument("--since-snapshot", metavar="PATH",
+                        help="Incremental export: reuse the data of guilds unchanged since this previous export, "
+                             "a JSON file or the directory of a streamed or ndjson export")
+    parser.add_argument("--delta-output", metavar="FILE",
+                        help="Delta file of an incremental export (default: auto-generated)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Split the guilds over this many worker processes sharing the rate limit (default: 1)")
+    parser.add_argument("--shared-ratelimit", nargs="?", const="", metavar="DIR",
+                        help="Share rate limits with other processes using the same token through a "
+                             "file-locked store in DIR (default: the temporary directory)")
+    parser.add_argument("--parallel-bots", type=int, default=0,
+                        help="Number of bots of a --tokens-file batch exported at once (default: all)")
+    parser.add_argument("--cache-file", nargs="?", const=DEFAULT_CACHE_FILE, metavar="FILE",
+                        help=f"Cache slow-changing API responses in this SQLite file "
+                             f"(default when given without FILE: {DEFAULT_CACHE_FILE})")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read or write the response cache")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Refetch every cached response and store the new ones in the cache")
+    parser.add_argument("--stats", action="store_true",
+                        help="Print request counts, latencies and rate limit waits per route when done")
+    parser.add_argument("--checkpoint", metavar="JOURNAL",
+                        help="Record completed export units in this journal directory so the export can be resumed")
+    parser.add_argument("--resume", metavar="JOURNAL",
+                        help="Resume an interrupted export from its journal directory, skipping completed units")
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument("--record", metavar="CASSETTE",
+                                help="Record every API response to this gzipped cassette file (tokens are not recorded)")
+    cassette_group.add_argument("--replay", metavar="CASSETTE",
+                                help="Serve every API request from a recorded cassette instead of Discord; "
+                                     "pass any token with the recorded bot ID")
+    parser.add_argument("--replay-pace", action="store_true",
+                        help="Replay at the recorded latencies and rate limits instead of at full speed")
     
     # Utility command arguments
     utility_group = parser.add_argument_group("Discord API Utility Commands")
@@ -1413,7 +4101,11 @@ async def main():
         return
     
     # Set up exporter
-    exporter = DiscordExporter()
+    if args.tokens_file:
+        await run_batch_export(args)
+        return
+    
+    exporter = create_exporter(args)
     
     # Set authentication method
     if args.token:
@@ -1438,8 +4130,8 @@ async def main():
                 args.category_id
             )
             if not args.no_save and result:
-                with open(f"channel_{args.name}.json", "w") as f:
-                    json.dump(result, f, indent=4)
+                with open(f"channel_{args.name}.json", "wb") as f:
+                    f.write(dump_json(result, indent=4))
         elif args.channel_type == "voice":
             result = await create_voice_channel(
                 exporter, 
@@ -1450,8 +4142,8 @@ async def main():
                 args.category_id
             )
             if not args.no_save and result:
-                with open(f"voice_channel_{args.name}.json", "w") as f:
-                    json.dump(result, f, indent=4)
+                with open(f"voice_channel_{args.name}.json", "wb") as f:
+                    f.write(dump_json(result, indent=4))
         elif args.channel_type == "category":
             result = await create_category(
                 exporter, 
@@ -1459,8 +4151,8 @@ async def main():
                 args.name
             )
             if not args.no_save and result:
-                with open(f"category_{args.name}.json", "w") as f:
-                    json.dump(result, f, indent=4)
+                with open(f"category_{args.name}.json", "wb") as f:
+                    f.write(dump_json(result, indent=4))
     
     # Handle role creation
     if args.create_role and args.token and args.guild_id and args.name:
@@ -1474,8 +4166,8 @@ async def main():
             args.mentionable
         )
         if not args.no_save and result:
-            with open(f"role_{args.name}.json", "w") as f:
-                json.dump(result, f, indent=4)
+            with open(f"role_{args.name}.json", "wb") as f:
+                f.write(dump_json(result, indent=4))
     
     # Handle message sending
     if args.send_message and args.token and args.channel_id and args.content:
@@ -1496,8 +4188,8 @@ async def main():
             embed
         )
         if not args.no_save and result:
-            with open(f"message_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.json", "w") as f:
-                json.dump(result, f, indent=4)
+            with open(f"message_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.json", "wb") as f:
+                f.write(dump_json(result, indent=4))
     
     # Handle webhook creation
     if args.create_webhook and args.token and args.channel_id and args.name:
@@ -1509,8 +4201,8 @@ async def main():
             args.image_url
         )
         if not args.no_save and result:
-            with open(f"webhook_{args.name}.json", "w") as f:
-                json.dump(result, f, indent=4)
+            with open(f"webhook_{args.name}.json", "wb") as f:
+                f.write(dump_json(result, indent=4))
     
     # Handle invite creation
     if args.create_invite and args.token and args.channel_id:
@@ -1523,8 +4215,8 @@ async def main():
             args.temporary
         )
         if not args.no_save and result:
-            with open(f"invite_{args.channel_id}.json", "w") as f:
-                json.dump(result, f, indent=4)
+            with open(f"invite_{args.channel_id}.json", "wb") as f:
+                f.write(dump_json(result, indent=4))
             print(f"Invite URL: https://discord.gg/{result['code']}")
     
     # Handle reaction adding
@@ -1547,8 +4239,8 @@ async def main():
             args.message_id
         )
         if not args.no_save and result:
-            with open(f"thread_{args.name}.json", "w") as f:
-                json.dump(result, f, indent=4)
+            with open(f"thread_{args.name}.json", "wb") as f:
+                f.write(dump_json(result, indent=4))
     
     # Handle pinning message
     if args.pin_message and args.token and args.channel_id and args.message_id:
@@ -1571,8 +4263,8 @@ async def main():
             args.guild_id
         )
         if not args.no_save and result:
-            with open(f"slash_command_{args.name}.json", "w") as f:
-                json.dump(result, f, indent=4)
+            with open(f"slash_command_{args.name}.json", "wb") as f:
+                f.write(dump_json(result, indent=4))
                 
     # Handle role operations
     if args.add_role and args.token and args.guild_id and args.user_id and args.role_id:
@@ -1601,8 +4293,8 @@ async def main():
             args.user_id
         )
         if not args.no_save and result:
-            with open(f"dm_channel_{args.user_id}.json", "w") as f:
-                json.dump(result, f, indent=4)
+            with open(f"dm_channel_{args.user_id}.json", "wb") as f:
+                f.write(dump_json(result, indent=4))
     
     # Handle stage instance creation
     if args.create_stage and args.token and args.channel_id and args.topic:
@@ -1613,8 +4305,8 @@ async def main():
             args.topic
         )
         if not args.no_save and result:
-            with open(f"stage_{args.topic}.json", "w") as f:
-                json.dump(result, f, indent=4)
+            with open(f"stage_{args.topic}.json", "wb") as f:
+                f.write(dump_json(result, indent=4))
     
     # Handle scheduled event creation
     if args.create_event and args.token and args.guild_id and args.name and args.description and args.start_time:
@@ -1632,8 +4324,8 @@ async def main():
             args.image_url
         )
         if not args.no_save and result:
-            with open(f"event_{args.name}.json", "w") as f:
-                json.dump(result, f, indent=4)
+            with open(f"event_{args.name}.json", "wb") as f:
+                f.write(dump_json(result, indent=4))
     
     # Handle user banning
     if args.create_ban and args.token and args.guild_id and args.user_id:
@@ -1648,15 +4340,18 @@ async def main():
     
     # Run normal export if no utility command was used
     if not utility_command_used:
-        export_data = await exporter.run_export()
-        
-        # Handle output
-        if not args.no_save:
-            exporter.save_to_file(args.output)
-        else:
-            # Print to stdout
-            indent = 2 if args.pretty else None
-            print(json.dumps(export_data, indent=indent))
+        try:
+            exporters = get_export_functions(args)
+        except ValueError as e:
+            print(f"{Fore.RED}{str(e)}. Use -H to list the available functions.{Style.RESET_ALL}")
+            await exporter.close_session()
+            return
+        await run_cli_export(exporter, args, exporters)
+        if exporter.replay_incomplete():
+            sys.exit(1)
+    else:
+        # run_export closes its own session, utility commands leave it open
+        await exporter.close_session()
 
 # ---- Discord Bot Utility Functions (Not Export Related) ----
 
@@ -1937,6 +4632,9 @@ async def create_webhook(bot, channel_id: str, name: str, avatar_url: str = None
         }
         
         if avatar_url:
+            if not bot.session:
+                await bot.initialize_session()
+            
             # Download avatar and convert to base64
             async with bot.session.get(avatar_url) as resp:
                 if resp.status == 200:
@@ -2749,19 +5447,18 @@ async def create_webhook_message(bot, webhook_id: str, webhook_token: str, conte
         if not bot.session:
             await bot.initialize_session()
             
-        response = await bot.session.post(url, headers=headers, json=data)
-        
-        if response.status == 204:
-            print(f"{Fore.GREEN}✓ Sent webhook message successfully{Style.RESET_ALL}")
-            return True
-        else:
-            result = await response.json()
-            if result and 'id' in result:
+        async with bot.session.post(url, headers=headers, json=data) as response:
+            if response.status == 204:
                 print(f"{Fore.GREEN}✓ Sent webhook message successfully{Style.RESET_ALL}")
-                return result
+                return True
             else:
-                print(f"{Fore.RED}Failed to send webhook message{Style.RESET_ALL}")
-                return None
+                result = await response.json()
+                if result and 'id' in result:
+                    print(f"{Fore.GREEN}✓ Sent webhook message successfully{Style.RESET_ALL}")
+                    return result
+                else:
+                    print(f"{Fore.RED}Failed to send webhook message{Style.RESET_ALL}")
+                    return None
     except Exception as e:
         print(f"{Fore.RED}Error sending webhook message: {str(e)}{Style.RESET_ALL}")
         return None